@@ -0,0 +1,204 @@
+import numpy as np
+from sqlalchemy import String, cast, exists, literal, select, union_all
+
+from models import Exercise, SetLog, WorkoutExercise, WorkoutSession
+from tracking import parse_datetime
+
+BUCKETS = ('day', 'week', 'month')
+GROUPS = {'exercise': 'exercise_id', 'muscle_group': 'muscle_group'}
+DEFAULT_WINDOW = 4  # buckets in the rolling average
+MAX_WINDOW = 52
+MAX_BUCKETS = 1000
+# Epley overestimates badly on long sets, so they don't count towards e1RM
+E1RM_MAX_REPS = 12
+
+set_logs = SetLog.__table__
+workout_sessions = WorkoutSession.__table__
+workout_exercises = WorkoutExercise.__table__
+exercises = Exercise.__table__
+
+
+class AnalyticsError(ValueError):
+    pass
+
+
+def parse_options(args):
+    bucket = args.get('bucket', 'week')
+    if bucket not in BUCKETS:
+        raise AnalyticsError(f"bucket must be one of: {', '.join(BUCKETS)}")
+    group_by = args.get('group_by', 'exercise')
+    if group_by not in GROUPS:
+        raise AnalyticsError(f"group_by must be one of: {', '.join(GROUPS)}")
+    try:
+        window = int(args.get('window', DEFAULT_WINDOW))
+    except ValueError:
+        window = 0
+    if not 1 <= window <= MAX_WINDOW:
+        raise AnalyticsError(f'window must be an integer from 1 to {MAX_WINDOW}')
+
+    options = {'bucket': bucket, 'group_by': group_by, 'window': window}
+    for name in ('since', 'until'):
+        try:
+            options[name] = parse_datetime(args[name]) if name in args else None
+        except ValueError:
+            raise AnalyticsError(f'{name} must be an ISO 8601 date or datetime')
+    for name in ('exercise_id', 'muscle_group'):
+        options[name] = args.get(name)
+    if options['exercise_id'] is not None:
+        try:
+            options['exercise_id'] = int(options['exercise_id'])
+        except ValueError:
+            raise AnalyticsError('exercise_id must be an integer')
+    return options
+
+
+def _within(column, since, until):
+    conditions = []
+    if since is not None:
+        conditions.append(column >= since)
+    if until is not None:
+        conditions.append(column < until)
+    return conditions
+
+
+def training_query(user_id, since=None, until=None, exercise_id=None, muscle_group=None):
+    """One statement returning (at, exercise_id, muscle_group, sets, reps,
+    weight) for everything user_id trained.
+
+    Logged sets come from set_logs (a range scan of
+    ix_set_logs_user_id_exercise_id_performed_at). Finished sessions without
+    logged sets count the prescribed sets of their workout instead. at is
+    returned as ISO text: NumPy parses that many times faster than it
+    converts datetime objects.
+    """
+    logged = select(
+        set_logs.c.performed_at.label('at'), set_logs.c.exercise_id, literal(1).label('sets'),
+        set_logs.c.reps, set_logs.c.weight,
+    ).where(set_logs.c.user_id == user_id, *_within(set_logs.c.performed_at, since, until))
+
+    planned = select(
+        workout_sessions.c.started_at, workout_exercises.c.exercise_id, workout_exercises.c.sets,
+        workout_exercises.c.reps, workout_exercises.c.weight,
+    ).select_from(
+        workout_sessions.join(workout_exercises, workout_exercises.c.workout_id == workout_sessions.c.workout_id)
+    ).where(
+        workout_sessions.c.user_id == user_id,
+        workout_sessions.c.ended_at.is_not(None),
+        ~exists().where(set_logs.c.session_id == workout_sessions.c.id),
+        *_within(workout_sessions.c.started_at, since, until),
+    )
+
+    if exercise_id is not None:
+        logged = logged.where(set_logs.c.exercise_id == exercise_id)
+        planned = planned.where(workout_exercises.c.exercise_id == exercise_id)
+
+    training = union_all(logged, planned).subquery()
+    query = select(
+        cast(training.c.at, String).label('at'), training.c.exercise_id, exercises.c.muscle_group,
+        training.c.sets, training.c.reps, training.c.weight,
+    ).join(exercises, exercises.c.id == training.c.exercise_id)
+    if muscle_group is not None:
+        query = query.where(exercises.c.muscle_group == muscle_group)
+    return query
+
+
+def _bucket_starts(at, bucket):
+    """Start of each timestamp's bucket, as datetime64[D] (day, week) or
+    datetime64[M] (month). Weeks start on Monday."""
+    if bucket == 'month':
+        return at.astype('datetime64[M]')
+    days = at.astype('datetime64[D]')
+    if bucket == 'week':
+        # 1970-01-01 was a Thursday: (days + 3) % 7 is 0 on Mondays
+        offset = (days.astype('int64') + 3) % 7
+        days = days - offset.astype('timedelta64[D]')
+    return days
+
+
+def _rolling_mean(matrix, window):
+    """Trailing mean over the last window columns (fewer at the start)."""
+    totals = np.cumsum(matrix, axis=-1)
+    totals[..., window:] = totals[..., window:] - totals[..., :-window]
+    counts = np.minimum(np.arange(1, matrix.shape[-1] + 1), window)
+    return totals / counts
+
+
+def _values(array, digits=1):
+    """JSON-ready list: rounded floats, null where there is no value."""
+    rounded = np.round(array, digits)
+    return [None if value != value else value for value in rounded.tolist()]
+
+
+def _counts(array):
+    return array.astype(np.int64).tolist()
+
+
+def progress(rows, bucket='week', group_by='exercise', window=DEFAULT_WINDOW):
+    """Volume and estimated one-rep max per bucket for each exercise (or
+    muscle group) in rows from training_query.
+
+    Everything after fetching is columnar: rows are split into arrays once,
+    and bucketing, volume (sets x reps x weight), Epley e1RM
+    (weight x (1 + reps / 30)), per-group maxima and rolling averages are
+    array operations. Buckets are contiguous, so idle weeks show up as zero volume.
+    """
+    options = {'bucket': bucket, 'group_by': group_by, 'window': window}
+    if not rows:
+        return {**options, 'buckets': [], 'series': [], 'totals': {'volume': [], 'volume_avg': [], 'sets': []}}
+
+    at, exercise_ids, muscle_groups, sets, reps, weight = zip(*rows)
+    starts = _bucket_starts(np.array(at, dtype='datetime64[us]'), bucket)
+    sets = np.array(sets, dtype=np.float64)
+    reps = np.array(reps, dtype=np.float64)
+    # Bodyweight sets have no weight: they add sets but no volume or e1RM
+    weight = np.nan_to_num(np.array(weight, dtype=np.float64))
+
+    step = 7 if bucket == 'week' else 1
+    first = starts.min()
+    column = (starts - first).astype('int64') // step
+    n_buckets = int(column.max()) + 1
+    if n_buckets > MAX_BUCKETS:
+        raise AnalyticsError(f'{n_buckets} {bucket}s requested, at most {MAX_BUCKETS}: '
+                             f'use a coarser bucket or narrow since/until')
+
+    keys = exercise_ids if group_by == 'exercise' else muscle_groups
+    labels, row = np.unique(np.array(keys), return_inverse=True)
+    row = row.reshape(-1)
+    cell = row * n_buckets + column
+    shape = (len(labels), n_buckets)
+
+    size = shape[0] * shape[1]
+    volume = np.bincount(cell, weights=sets * reps * weight, minlength=size).reshape(shape)
+    set_counts = np.bincount(cell, weights=sets, minlength=size).reshape(shape)
+
+    rated = (reps >= 1) & (reps <= E1RM_MAX_REPS) & (weight > 0)
+    e1rm = np.where(reps == 1, weight, weight * (1 + reps / 30))
+    best = np.full(size, np.nan)
+    np.fmax.at(best, cell[rated], e1rm[rated])
+    best = best.reshape(shape)
+    record = np.fmax.accumulate(best, axis=1)
+
+    volume_avg = _rolling_mean(volume, window)
+    total_volume = volume.sum(axis=0)
+    bucket_starts = first + np.arange(n_buckets) * step
+    key = GROUPS[group_by]
+    return {
+        **options,
+        'buckets': np.datetime_as_string(bucket_starts.astype('datetime64[D]'), unit='D').tolist(),
+        'series': [
+            {
+                key: label,
+                'volume': _values(volume[index]),
+                'volume_avg': _values(volume_avg[index]),
+                'sets': _counts(set_counts[index]),
+                'e1rm': _values(best[index]),
+                'e1rm_best': _values(record[index]),
+            }
+            for index, label in enumerate(labels.tolist())
+        ],
+        'totals': {
+            'volume': _values(total_volume),
+            'volume_avg': _values(_rolling_mean(total_volume, window)),
+            'sets': _counts(set_counts.sum(axis=0)),
+        },
+    }
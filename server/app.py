@@ -3,16 +3,29 @@ from flask_restful import Api
 from flask_migrate import Migrate
 from flask_cors import CORS
 import os
+import sys
+import click
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from models import db
+from database import configure_database
+from cache import catalog_cache
+from instrumentation import init_instrumentation
+from representations import init_representations
+from sync import prune_changes
+from transfer import TABLE_ORDER, IMPORT_CHUNK_SIZE, export_lines, import_file, open_file
 from routes import (
     UserListResource, UserResource,
-    ExerciseListResource, ExerciseResource,
-    WorkoutListResource, WorkoutResource,
-    WorkoutExerciseListResource, WorkoutExerciseResource,
+    ExerciseListResource, ExerciseResource, ExerciseSearchResource, ExerciseFacetsResource,
+    WorkoutListResource, WorkoutResource, WorkoutSearchResource,
+    WorkoutDetailResource, WorkoutDetailListResource,
+    WorkoutExerciseListResource, WorkoutExerciseResource, WorkoutExerciseBulkResource, WorkoutCloneResource,
     UserExerciseListResource, UserExerciseResource,
+    WorkoutSessionListResource, WorkoutSessionResource, SetLogBatchResource,
     InstructorListResource, InstructorResource,
-    register, login, logout, current_user, my_exercises, my_workouts
+    ExportResource, ImportResource,
+    register, login, logout, current_user, my_exercises, my_workouts, sync,
+    progress_analytics
 )
 
 load_dotenv()
@@ -23,12 +36,49 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
 app.config['SESSION_COOKIE_SAMESITE'] = 'None'
 app.config['SESSION_COOKIE_SECURE'] = True  # HTTPS required for production
+# Compiled serializers; set FAST_SERIALIZER=0 to fall back to SerializerMixin.to_dict
+app.config['FAST_SERIALIZER'] = os.environ.get('FAST_SERIALIZER', '1') != '0'
+# Catalog cache: 'memory' is per gunicorn worker, 'sqlite' is shared by all workers on the host
+app.config['CATALOG_CACHE_BACKEND'] = os.environ.get('CATALOG_CACHE_BACKEND', 'memory')
+app.config['CATALOG_CACHE_SIZE'] = int(os.environ.get('CATALOG_CACHE_SIZE', 1024))
+app.config['CATALOG_CACHE_TTL'] = int(os.environ.get('CATALOG_CACHE_TTL', 300))
+if os.environ.get('CATALOG_CACHE_PATH'):
+    app.config['CATALOG_CACHE_PATH'] = os.environ['CATALOG_CACHE_PATH']
+# Per-request SQL/serialization timing, Server-Timing headers and /metrics
+app.config['INSTRUMENTATION'] = os.environ.get('INSTRUMENTATION', '0') == '1'
+app.config['SLOW_REQUEST_MS'] = int(os.environ.get('SLOW_REQUEST_MS', 500))
+# orjson for response bodies; FAST_JSON=0 keeps the stdlib encoder
+app.config['FAST_JSON'] = os.environ.get('FAST_JSON', '1') != '0'
+# gzip/brotli for responses of at least COMPRESS_MIN_SIZE bytes
+app.config['COMPRESSION'] = os.environ.get('COMPRESSION', '1') != '0'
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
 
-db.init_app(app)
+# Read replica for GET requests: a database URL, or 'snapshot' for a local
+# SQLite copy refreshed every REPLICA_REFRESH_SECONDS
+app.config['READ_REPLICA'] = os.environ.get('READ_REPLICA', '')
+app.config['REPLICA_REFRESH_SECONDS'] = float(os.environ.get('REPLICA_REFRESH_SECONDS', 5))
+app.config['REPLICA_PIN_SECONDS'] = float(os.environ.get('REPLICA_PIN_SECONDS', 10))
+if os.environ.get('REPLICA_SNAPSHOT_PATH'):
+    app.config['REPLICA_SNAPSHOT_PATH'] = os.environ['REPLICA_SNAPSHOT_PATH']
+# Pool sizing (DB_POOL_*) and SQLite pragmas (SQLITE_*); see database.py
+configure_database(app)
+catalog_cache.init_app(app)
 migrate = Migrate(app, db)
 api = Api(app)
+init_representations(app, api)
 CORS(app, supports_credentials=True, origins=['http://localhost:5173', 'https://fitforge-app.onrender.com'])
 
+def cache_metrics():
+    stats = catalog_cache.stats()
+    return [
+        ('catalog_cache_hits_total', 'counter', 'Catalog cache hits', stats['hits']),
+        ('catalog_cache_misses_total', 'counter', 'Catalog cache misses', stats['misses']),
+        ('catalog_cache_evictions_total', 'counter', 'Catalog cache LRU evictions', stats['evictions']),
+        ('catalog_cache_entries', 'gauge', 'Entries in the catalog cache', stats['size']),
+    ]
+
+init_instrumentation(app, extra_metrics=cache_metrics)
+
 # Authentication routes
 app.add_url_rule('/register', 'register', register, methods=['POST'])
 app.add_url_rule('/login', 'login', login, methods=['POST'])
@@ -36,20 +86,73 @@ app.add_url_rule('/logout', 'logout', logout, methods=['POST'])
 app.add_url_rule('/current-user', 'current_user', current_user)
 app.add_url_rule('/my-exercises', 'my_exercises', my_exercises)
 app.add_url_rule('/my-workouts', 'my_workouts', my_workouts)
+app.add_url_rule('/sync', 'sync', sync)
+app.add_url_rule('/analytics/progress', 'progress_analytics', progress_analytics)
 
 # Register API resources
 api.add_resource(UserListResource, '/users')
 api.add_resource(UserResource, '/users/<int:id>')
 api.add_resource(ExerciseListResource, '/exercises')
 api.add_resource(ExerciseResource, '/exercises/<int:id>')
+api.add_resource(ExerciseSearchResource, '/exercises/search')
+api.add_resource(ExerciseFacetsResource, '/exercises/facets')
 api.add_resource(WorkoutListResource, '/workouts')
 api.add_resource(WorkoutResource, '/workouts/<int:id>')
+api.add_resource(WorkoutSearchResource, '/workouts/search')
+api.add_resource(WorkoutDetailResource, '/workouts/<int:id>/full')
+api.add_resource(WorkoutDetailListResource, '/workouts/full')
+api.add_resource(WorkoutExerciseBulkResource, '/workouts/<int:id>/exercises')
+api.add_resource(WorkoutCloneResource, '/workouts/<int:id>/clone')
 api.add_resource(WorkoutExerciseListResource, '/workout-exercises')
 api.add_resource(WorkoutExerciseResource, '/workout-exercises/<int:id>')
 api.add_resource(UserExerciseListResource, '/user-exercises')
 api.add_resource(UserExerciseResource, '/user-exercises/<int:id>')
+api.add_resource(WorkoutSessionListResource, '/workout-sessions')
+api.add_resource(WorkoutSessionResource, '/workout-sessions/<int:id>')
+api.add_resource(SetLogBatchResource, '/workout-sessions/<int:id>/sets')
 api.add_resource(InstructorListResource, '/instructors')
 api.add_resource(InstructorResource, '/instructors/<int:id>')
+api.add_resource(ExportResource, '/admin/export')
+api.add_resource(ImportResource, '/admin/import')
+
+# Data transfer commands: flask --app app export data.ndjson.gz / import data.ndjson.gz
+@app.cli.command('export')
+@click.argument('path')
+@click.option('--tables', default='', help=f"Comma-separated subset of {', '.join(TABLE_ORDER)}")
+def export_command(path, tables):
+    """Write catalog and workout data as NDJSON ('-' for stdout, .gz to compress)."""
+    tables = [name for name in tables.split(',') if name]
+    count = 0
+    out = sys.stdout.buffer if path == '-' else open_file(path, 'w')
+    try:
+        for chunk in export_lines(tables):
+            out.write(chunk)
+            count += chunk.count(b'\n')
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    click.echo(f'Exported {count} rows', err=True)
+
+@app.cli.command('import')
+@click.argument('path')
+@click.option('--chunk-size', default=IMPORT_CHUNK_SIZE, show_default=True, help='Rows per INSERT and commit')
+@click.option('--checkpoint', default=None, help='Checkpoint file (default: PATH.checkpoint)')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint and start from the beginning')
+def import_command(path, chunk_size, checkpoint, restart):
+    """Load NDJSON written by export, resuming from the last checkpoint."""
+    counts, skipped = import_file(
+        path, chunk_size=chunk_size, checkpoint_path=checkpoint, restart=restart,
+        progress=lambda offset, counts: click.echo(f'  {offset} bytes, {sum(counts.values())} rows', err=True),
+    )
+    for name in TABLE_ORDER:
+        click.echo(f'{name}: {counts[name]} rows, {skipped[name]} skipped (missing parent)')
+
+@app.cli.command('prune-changes')
+@click.option('--days', default=90, show_default=True, help='Keep change log entries this many days old or newer')
+def prune_changes_command(days):
+    """Delete old /sync change log entries; clients behind them get 410 and start over."""
+    count = prune_changes(datetime.utcnow() - timedelta(days=days))
+    click.echo(f'Pruned {count} change log entries')
 
 @app.route('/')
 def home():
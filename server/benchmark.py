@@ -0,0 +1,316 @@
+"""Endpoint benchmarks against generated datasets.
+
+    python benchmark.py --sizes 1000,10000 --requests 200 --output before.json
+    python benchmark.py --mode gunicorn --workers 4 --concurrency 16 --sizes 10000
+
+Each size is a number of users; the dataset is built with seed.py's
+generator. In 'client' mode requests go through the Flask test client in a
+subprocess (no network, one request at a time). In 'gunicorn' mode a local
+gunicorn serves the app and --concurrency threads send HTTP requests, each
+logged in as a different user. Results are JSON with latency percentiles and
+throughput per scenario, so runs from two commits can be diffed.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+PASSWORD = 'password123'
+
+
+def user_email(user_id):
+    # Matches seed.py's generator; user 1 is the admin
+    return 'admin@fitforge.com' if user_id == 1 else f'user{user_id}@fitforge.com'
+
+
+class Scenario:
+    """A timed request. prepare(client, i) runs untimed before request i and
+    returns the url to hit; url is used as-is when there is nothing to prepare."""
+
+    def __init__(self, name, method, url=None, body=None, prepare=None):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.body = body
+        self.prepare = prepare
+
+    def target(self, client, i):
+        return self.prepare(client, i) if self.prepare else self.url
+
+
+def _own_workout(client, i):
+    workouts = client.request('GET', '/my-workouts?limit=1')[1]
+    if workouts['items']:
+        return f"/workouts/{workouts['items'][0]['id']}"
+    created = client.request('POST', '/workouts', {'name': 'Bench', 'description': '', 'duration': 30, 'instructor_id': 1})
+    return f"/workouts/{created[1]['id']}"
+
+
+def _new_workout(client, i):
+    created = client.request('POST', '/workouts', {'name': f'Bench {i}', 'description': '', 'duration': 30, 'instructor_id': 1})
+    return f"/workouts/{created[1]['id']}"
+
+
+def _new_user_exercise(client, i):
+    mine = {row['exercise_id'] for row in client.request('GET', '/my-exercises')[1]}
+    exercise_id = next(id for id in range(1, 10 ** 9) if id not in mine)
+    created = client.request('POST', '/user-exercises', {'exercise_id': exercise_id})
+    return f"/user-exercises/{created[1]['id']}"
+
+
+SCENARIOS = [
+    Scenario('POST /login', 'POST', '/login'),  # body filled in per client
+    Scenario('GET /exercises?limit=50', 'GET', '/exercises?limit=50'),
+    Scenario('GET /exercises?category&limit=50', 'GET', '/exercises?category=Yoga&difficulty=Beginner&limit=50'),
+    Scenario('GET /exercises/<id>', 'GET', prepare=lambda client, i: f'/exercises/{i % 100 + 1}'),
+    Scenario('GET /workouts?limit=50', 'GET', '/workouts?limit=50'),
+    Scenario('GET /workouts/<id>/full', 'GET', prepare=lambda client, i: f'/workouts/{i % 50 + 1}/full'),
+    Scenario('GET /my-workouts', 'GET', '/my-workouts'),
+    Scenario('GET /my-exercises', 'GET', '/my-exercises'),
+    Scenario('GET /user-exercises?limit=50', 'GET', '/user-exercises?limit=50'),
+    Scenario('PATCH /exercises/<id>', 'PATCH', body={'difficulty': 'Intermediate'},
+             prepare=lambda client, i: f'/exercises/{i % 100 + 1}'),
+    Scenario('PATCH /workouts/<id>', 'PATCH', body={'duration': 45}, prepare=_own_workout),
+    Scenario('DELETE /workouts/<id>', 'DELETE', prepare=_new_workout),
+    Scenario('DELETE /user-exercises/<id>', 'DELETE', prepare=_new_user_exercise),
+]
+
+
+class TestClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, url, body=None):
+        response = self.client.open(url, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HTTPClient:
+    def __init__(self, host, port):
+        self.connection = http.client.HTTPConnection(host, port, timeout=60)
+        self.cookie = None
+
+    def request(self, method, url, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        payload = json.dumps(body) if body is not None else None
+        self.connection.request(method, url, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        return response.status, json.loads(data) if data else None
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'mean_ms': round(sum(latencies) / count * 1000, 3) if count else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3) if count else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3) if count else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3) if count else None,
+        'max_ms': round(latencies[-1] * 1000, 3) if count else None,
+        'throughput_rps': round(count / elapsed, 1) if elapsed else None,
+    }
+
+
+def run_scenario(scenario, client, user_id, requests):
+    """Return (latencies, errors, seconds spent in untimed prepare steps)."""
+    latencies, errors, preparing = [], 0, 0.0
+    for i in range(requests):
+        prepare_started = time.perf_counter()
+        url = scenario.target(client, i)
+        preparing += time.perf_counter() - prepare_started
+        body = {'email': user_email(user_id), 'password': PASSWORD} if scenario.name == 'POST /login' else scenario.body
+        started = time.perf_counter()
+        status, _ = client.request(scenario.method, url, body)
+        latencies.append(time.perf_counter() - started)
+        if status >= 400:
+            errors += 1
+    return latencies, errors, preparing
+
+
+def login(client, user_id):
+    status, _ = client.request('POST', '/login', {'email': user_email(user_id), 'password': PASSWORD})
+    if status != 200:
+        raise RuntimeError(f'Could not log in as {user_email(user_id)} ({status})')
+
+
+def run_client_mode(requests, only):
+    from app import app
+
+    results = {}
+    client = TestClient(app)
+    login(client, 2)
+    for scenario in SCENARIOS:
+        if only and scenario.name not in only:
+            continue
+        started = time.perf_counter()
+        latencies, errors, preparing = run_scenario(scenario, client, 2, requests)
+        results[scenario.name] = summarize(latencies, errors, time.perf_counter() - started - preparing)
+    return results
+
+
+def run_http_mode(host, port, requests, concurrency, only):
+    clients = []
+    for n in range(concurrency):
+        client = HTTPClient(host, port)
+        login(client, n + 2)
+        clients.append((client, n + 2))
+
+    results = {}
+    per_client = max(1, requests // concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for scenario in SCENARIOS:
+            if only and scenario.name not in only:
+                continue
+            started = time.perf_counter()
+            outcomes = list(executor.map(
+                lambda pair: run_scenario(scenario, pair[0], pair[1], per_client), clients
+            ))
+            # Clients prepare in parallel; take out the average untimed share
+            preparing = sum(outcome[2] for outcome in outcomes) / len(outcomes)
+            elapsed = time.perf_counter() - started - preparing
+            latencies = [latency for outcome in outcomes for latency in outcome[0]]
+            results[scenario.name] = summarize(latencies, sum(outcome[1] for outcome in outcomes), elapsed)
+    return results
+
+
+def generate(database_url, size, args):
+    dataset = {
+        'users': size,
+        'exercises': max(100, size // 20),
+        'workouts_per_user': args.workouts_per_user,
+        'seed': args.seed,
+    }
+    command = [sys.executable, 'seed.py', '--users', str(size), '--exercises', str(dataset['exercises']),
+               '--workouts-per-user', str(args.workouts_per_user), '--seed', str(args.seed)]
+    env = dict(os.environ, DATABASE_URL=database_url)
+    subprocess.run(command, cwd=SERVER_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+    return dataset
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'gunicorn did not start listening on port {port}')
+
+
+def benchmark_size(size, args, data_dir):
+    path = os.path.join(data_dir, f'fitforge-bench-{size}-{args.seed}.db')
+    database_url = f'sqlite:///{path}'
+    if args.reuse and os.path.exists(path):
+        dataset = {'users': size, 'reused': True}
+    else:
+        if os.path.exists(path):
+            os.remove(path)
+        print(f'Generating dataset for {size} users...', file=sys.stderr)
+        dataset = generate(database_url, size, args)
+    env = dict(os.environ, DATABASE_URL=database_url)
+    print(f'Benchmarking {size} users in {args.mode} mode...', file=sys.stderr)
+
+    if args.mode == 'client':
+        command = [sys.executable, os.path.abspath(__file__), '--measure', '--requests', str(args.requests)]
+        for name in args.only:
+            command += ['--only', name]
+        output = subprocess.run(command, cwd=SERVER_DIR, env=env, check=True, stdout=subprocess.PIPE).stdout
+        scenarios = json.loads(output)
+    else:
+        port = free_port()
+        server = subprocess.Popen(
+            ['gunicorn', '--workers', str(args.workers), '--bind', f'127.0.0.1:{port}', 'app:app'],
+            cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(port)
+            scenarios = run_http_mode('127.0.0.1', port, args.requests, args.concurrency, args.only)
+        finally:
+            server.terminate()
+            server.wait()
+    return {'size': size, 'dataset': dataset, 'scenarios': scenarios}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIR,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark FitForge endpoints against generated datasets.')
+    parser.add_argument('--sizes', default='1000,10000', help='comma-separated user counts')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--mode', choices=('client', 'gunicorn'), default='client')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent HTTP clients in gunicorn mode')
+    parser.add_argument('--workouts-per-user', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', help='where generated databases are kept (default: a temp dir)')
+    parser.add_argument('--reuse', action='store_true', help='reuse a database generated by an earlier run')
+    parser.add_argument('--only', action='append', default=[], help='run only this scenario (repeatable)')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    parser.add_argument('--measure', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    if args.measure:
+        # Child process in client mode: DATABASE_URL already points at the dataset
+        json.dump(run_client_mode(args.requests, args.only), sys.stdout)
+        return
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='fitforge-bench-')
+    os.makedirs(data_dir, exist_ok=True)
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'mode': args.mode,
+        'requests_per_scenario': args.requests,
+        'workers': args.workers if args.mode == 'gunicorn' else None,
+        'concurrency': args.concurrency if args.mode == 'gunicorn' else 1,
+        'results': [benchmark_size(int(size), args, data_dir) for size in args.sizes.split(',')],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from conditional import version_tag
+
+
+class MemoryBackend:
+    """Per-process LRU with a TTL. Each gunicorn worker holds its own copy."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """LRU with a TTL in a local SQLite file shared by every worker on the host.
+
+    Invalidations issued by one worker are seen by the others on their next
+    lookup. Values must be JSON serializable.
+    """
+
+    def __init__(self, path, maxsize=10000, ttl=300):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self._local = threading.local()
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+            'expires_at REAL NOT NULL, accessed_at REAL NOT NULL, '
+            'PRIMARY KEY (namespace, key))'
+        )
+        self._connect().execute('CREATE INDEX IF NOT EXISTS ix_cache_accessed_at ON cache (accessed_at)')
+
+    def _connect(self):
+        # sqlite3 connections cannot be shared across threads; forked
+        # workers must not reuse the parent's connection either
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _ident(key):
+        return ':'.join(str(part) for part in key[1:])
+
+    def get(self, key):
+        namespace, ident = key[0], self._ident(key)
+        now = time.time()
+        row = self._connect().execute(
+            'SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?',
+            (namespace, ident),
+        ).fetchone()
+        if row is None:
+            return False, None
+        if row[1] < now:
+            self.delete(key)
+            return False, None
+        self._connect().execute(
+            'UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?',
+            (now, namespace, ident),
+        )
+        return True, json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (key[0], self._ident(key), json.dumps(value), now + self.ttl, now),
+        )
+        excess = conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0] - self.maxsize
+        if excess > 0:
+            conn.execute(
+                'DELETE FROM cache WHERE rowid IN '
+                '(SELECT rowid FROM cache ORDER BY accessed_at LIMIT ?)',
+                (excess,),
+            )
+            self.evictions += excess
+
+    def delete(self, key):
+        self._connect().execute(
+            'DELETE FROM cache WHERE namespace = ? AND key = ?', (key[0], self._ident(key))
+        )
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache')
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+
+class CatalogCache:
+    """Read-through cache for serialized catalog rows, keyed by (namespace,
+    id, catalog version).
+
+    The version comes from catalog_versions, which every worker shares and
+    every write bumps, so a write handled by any worker makes older entries
+    unreachable everywhere; they age out through the LRU and TTL. Configured from CATALOG_CACHE_BACKEND ('memory', 'sqlite' or 'none'),
+    CATALOG_CACHE_SIZE, CATALOG_CACHE_TTL and CATALOG_CACHE_PATH.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        kind = app.config.setdefault('CATALOG_CACHE_BACKEND', 'memory')
+        size = app.config.setdefault('CATALOG_CACHE_SIZE', 1024)
+        ttl = app.config.setdefault('CATALOG_CACHE_TTL', 300)
+        if kind == 'memory':
+            self.backend = MemoryBackend(maxsize=size, ttl=ttl)
+        elif kind == 'sqlite':
+            path = app.config.setdefault(
+                'CATALOG_CACHE_PATH', os.path.join(app.instance_path, 'catalog_cache.db')
+            )
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.backend = SQLiteBackend(path, maxsize=size, ttl=ttl)
+        elif kind == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f'Unknown CATALOG_CACHE_BACKEND: {kind}')
+
+    def get_or_load(self, namespace, key, loader, versions, cacheable=None):
+        """loader(), cached under the current version of the catalog_versions
+        names in versions (the tables the value is built from)."""
+        if self.backend is None:
+            return loader()
+        key = (namespace, key, version_tag(*versions))
+        hit, value = self.backend.get(key)
+        if hit:
+            self.hits += 1
+            return value
+        self.misses += 1
+        # Loaded through the same bind as the version (the replica on a
+        # GET), so a lagging replica's body is cached under its own version
+        value = loader()
+        if cacheable is None or cacheable(value):
+            self.backend.set(key, value)
+        return value
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'size': len(self.backend) if self.backend else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions if self.backend else 0,
+        }
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,134 @@
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from models import db
+from replica import REPLICA, init_replica, replica_bind
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer and busy_timeout makes a writer wait for the lock instead of
+# failing with "database is locked"; synchronous=NORMAL is durable under WAL
+# except for the last transactions before a power loss.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,         # ms
+    'mmap_size': 268435456,       # bytes (256 MiB)
+    'cache_size': -32768,         # negative = KiB (32 MiB) per connection
+    'temp_store': 'MEMORY',
+}
+
+# The read replica is opened read-only; only per-connection settings apply
+REPLICA_PRAGMAS = ('busy_timeout', 'mmap_size', 'cache_size', 'temp_store')
+
+SQLITE_PRAGMA_ENV = {
+    'journal_mode': 'SQLITE_JOURNAL_MODE',
+    'synchronous': 'SQLITE_SYNCHRONOUS',
+    'busy_timeout': 'SQLITE_BUSY_TIMEOUT_MS',
+    'mmap_size': 'SQLITE_MMAP_SIZE',
+    'cache_size': 'SQLITE_CACHE_SIZE',
+    'temp_store': 'SQLITE_TEMP_STORE',
+}
+
+# QueuePool settings, per process (i.e. per gunicorn worker)
+POOL_OPTIONS = {
+    'pool_size': ('DB_POOL_SIZE', int, 5),
+    'max_overflow': ('DB_MAX_OVERFLOW', int, 10),
+    'pool_timeout': ('DB_POOL_TIMEOUT', int, 30),
+    'pool_recycle': ('DB_POOL_RECYCLE', int, 1800),
+}
+
+
+def _is_memory(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def sqlite_pragmas(environ=os.environ):
+    pragmas = dict(SQLITE_PRAGMAS)
+    for name, variable in SQLITE_PRAGMA_ENV.items():
+        if environ.get(variable):
+            value = environ[variable]
+            pragmas[name] = int(value) if value.lstrip('-').isdigit() else value
+    return pragmas
+
+
+def engine_options(url, environ=os.environ):
+    options = {'pool_pre_ping': environ.get('DB_POOL_PRE_PING', '1') != '0'}
+    if _is_memory(url):
+        # In-memory SQLite lives in one connection; pool sizing does not apply
+        return options
+    for option, (variable, cast, default) in POOL_OPTIONS.items():
+        options[option] = cast(environ.get(variable, default))
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def dialect_insert(table):
+    """insert(table) for the session's dialect, which supports ON CONFLICT
+    (SQLite and PostgreSQL), or None on other backends."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(table)
+
+
+def configure_database(app):
+    """Initialise db for app with engine options, SQLite pragmas and the
+    optional read replica (see replica.py).
+
+    Options the app already set in SQLALCHEMY_ENGINE_OPTIONS win over the
+    environment-derived ones. The resulting profile is stored in
+    app.config['DATABASE_PROFILE'].
+    """
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    options = engine_options(url)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    pragmas = {}
+    if url.get_backend_name() == 'sqlite':
+        pragmas = app.config.get('SQLITE_PRAGMAS') or sqlite_pragmas()
+        if _is_memory(url):
+            pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+
+    bind, snapshot = replica_bind(app, url)
+    if bind is not None:
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA] = bind
+    app.config['DATABASE_PROFILE'] = {
+        'backend': url.get_backend_name(),
+        'engine_options': {name: value for name, value in options.items() if name != 'creator'},
+        'sqlite_pragmas': pragmas,
+        'read_replica': app.config.get('READ_REPLICA') or None,
+    }
+
+    db.init_app(app)
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite':
+                continue
+            engine_pragmas = pragmas if key is None else {
+                name: value for name, value in (pragmas or sqlite_pragmas()).items() if name in REPLICA_PRAGMAS
+            }
+            if engine_pragmas:
+                event.listen(engine, 'connect', _pragma_listener(engine_pragmas))
+    if bind is not None:
+        init_replica(app, snapshot)
+
+
+def _pragma_listener(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        set_sqlite_pragmas(dbapi_connection, pragmas)
+    return on_connect
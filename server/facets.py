@@ -0,0 +1,146 @@
+import threading
+
+from models import db, Exercise
+from conditional import catalog_versions
+
+if hasattr(int, 'bit_count'):
+    _popcount = int.bit_count
+else:
+    def _popcount(bits):
+        return bin(bits).count('1')
+
+
+def _bitset(ids, size):
+    """Bitset of ids (all < size) built in one pass over a bytearray; ORing
+    bits into an int one at a time copies the whole int every time."""
+    buffer = bytearray((size + 7) // 8)
+    for id in ids:
+        buffer[id >> 3] |= 1 << (id & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def _ids(bits, limit):
+    ids = []
+    while bits and len(ids) < limit:
+        low = bits & -bits
+        ids.append(low.bit_length() - 1)
+        bits ^= low
+    return ids
+
+
+class FacetIndex:
+    """In-memory inverted index: for each facet value, a bitset of row ids.
+
+    Bitsets are Python ints with bit n set for row id n. The index is tagged
+    with the catalog version it reflects. Local writes are applied
+    incrementally; a version written by another worker triggers a rebuild
+    on the next query.
+    """
+
+    def __init__(self, model, table, facets):
+        self.model = model
+        self.table = table
+        self.facets = facets
+        self.version = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.all = 0
+        self.bits = {facet: {} for facet in self.facets}
+        self.values = {}
+
+    def _add(self, id, values):
+        bit = 1 << id
+        self.all |= bit
+        self.values[id] = values
+        for facet, value in zip(self.facets, values):
+            self.bits[facet][value] = self.bits[facet].get(value, 0) | bit
+
+    def _remove(self, id):
+        values = self.values.pop(id, None)
+        if values is None:
+            return
+        bit = 1 << id
+        self.all &= ~bit
+        for facet, value in zip(self.facets, values):
+            remaining = self.bits[facet][value] & ~bit
+            if remaining:
+                self.bits[facet][value] = remaining
+            else:
+                del self.bits[facet][value]
+
+    def rebuild(self, version):
+        # Ids are grouped per facet value first and each bitset is built
+        # once; the new index is swapped in under the lock
+        columns = [self.model.id] + [getattr(self.model, facet) for facet in self.facets]
+        values = {}
+        groups = {facet: {} for facet in self.facets}
+        for row in db.session.query(*columns).yield_per(10000):
+            values[row[0]] = row_values = tuple(row[1:])
+            for facet, value in zip(self.facets, row_values):
+                groups[facet].setdefault(value, []).append(row[0])
+        size = max(values, default=0) + 1
+        bits = {
+            facet: {value: _bitset(ids, size) for value, ids in by_value.items()}
+            for facet, by_value in groups.items()
+        }
+        all_bits = _bitset(values, size)
+        with self._lock:
+            if self.version is not None and self.version >= version:
+                return  # another request already rebuilt to this version or later
+            self.all, self.bits, self.values, self.version = all_bits, bits, values, version
+
+    def ensure_current(self):
+        version = catalog_versions(self.table)[self.table]
+        # Versions only grow; a lagging read replica can report an older one
+        if self.version is None or version > self.version:
+            self.rebuild(version)
+
+    def apply(self, id, obj, version):
+        """Record a committed write (obj is None for a delete) at version."""
+        with self._lock:
+            if self.version is None:
+                return
+            if self.version != version - 1:
+                # Another worker wrote in between; rebuild on next query
+                self.version = None
+                return
+            self._remove(id)
+            if obj is not None:
+                self._add(id, tuple(getattr(obj, facet) for facet in self.facets))
+            self.version = version
+
+    def query(self, selected, limit):
+        """selected maps facet -> set of accepted values (OR within a facet).
+
+        Counts for each facet apply the other facets' selections but not its
+        own, so a multi-select picker can show what each extra value adds.
+        """
+        with self._lock:
+            masks = {}
+            for facet, values in selected.items():
+                mask = 0
+                for value in values:
+                    mask |= self.bits[facet].get(value, 0)
+                masks[facet] = mask
+
+            matching = self.all
+            for mask in masks.values():
+                matching &= mask
+
+            counts = {}
+            for facet in self.facets:
+                base = self.all
+                for other, mask in masks.items():
+                    if other != facet:
+                        base &= mask
+                counts[facet] = {}
+                for value, bits in self.bits[facet].items():
+                    count = _popcount(bits & base)
+                    if count:
+                        counts[facet][value] = count
+            return _popcount(matching), _ids(matching, limit), counts
+
+
+exercise_facets = FacetIndex(Exercise, 'exercises', ('category', 'muscle_group', 'difficulty', 'instructor_id'))
@@ -0,0 +1,71 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import RelationshipProperty, load_only, selectinload
+
+from pagination import PaginationError
+from serializers import serializable_fields
+
+
+class FieldsError(PaginationError):
+    pass
+
+
+def parse_fields(model, args):
+    """Validate ?fields=id,name,difficulty against model's serialized keys.
+
+    Returns a frozenset of keys (id is always included, so results can be
+    matched to requests), or None when every field is wanted.
+    """
+    raw = args.get('fields')
+    if raw is None or raw.strip() == '':
+        return None
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    allowed = serializable_fields(model)
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise FieldsError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return frozenset(fields) | {'id'}
+
+
+def column_fields(model):
+    """Every serialized column of model, without relationships."""
+    mapper = inspect(model)
+    return frozenset(name for name in serializable_fields(model)
+                     if not isinstance(mapper.attrs[name], RelationshipProperty))
+
+
+def fields_options(model, fields, loader=selectinload, extra=()):
+    """Loader options reading only the columns behind fields.
+
+    Other columns are left out of the SELECT (load_only), and relationships
+    are eager loaded only when requested, together with their own
+    serialize_options. extra names columns the caller needs besides fields,
+    e.g. the sort key for the next cursor.
+    """
+    mapper = inspect(model)
+    columns = {'id', *extra}
+    options = []
+    for name in fields:
+        attr = mapper.attrs[name]
+        if isinstance(attr, RelationshipProperty):
+            # The foreign key is needed to load the related row
+            columns.update(column.key for column in attr.local_columns)
+            nested = attr.mapper.class_.serialize_options(loader)
+            option = loader(getattr(model, name))
+            options.append(option.options(*nested) if nested else option)
+        else:
+            columns.add(name)
+    return (load_only(*(getattr(model, name) for name in sorted(columns))), *options)
+
+
+def query_options(model, fields, loader=selectinload, extra=()):
+    """serialize_options, narrowed to fields when there are any."""
+    if fields is None:
+        return model.serialize_options(loader)
+    return fields_options(model, fields, loader, extra)
+
+
+def project(data, fields):
+    """Narrow an already serialized dict (e.g. from the catalog cache) to fields."""
+    if fields is None:
+        return data
+    return {key: value for key, value in data.items() if key in fields}
@@ -0,0 +1,182 @@
+import logging
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('fitforge.perf')
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    __slots__ = ('started', 'queries', 'sql_time', 'serialize_time', 'statements', '_query_started')
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serialize_time = 0.0
+        self.statements = []
+        self._query_started = None
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Per-process histograms keyed by (metric, method, route)."""
+
+    METRICS = {
+        'request_duration_seconds': ('Time spent handling the request', SECONDS_BUCKETS),
+        'sql_duration_seconds': ('Time spent executing SQL per request', SECONDS_BUCKETS),
+        'sql_queries': ('SQL statements executed per request', QUERY_COUNT_BUCKETS),
+        'serialize_duration_seconds': ('Time spent serializing rows per request', SECONDS_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, method, route, values):
+        with self._lock:
+            for name, value in values.items():
+                key = (name, method, route)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(self.METRICS[name][1])
+                histogram.observe(value)
+
+    def render(self, extra=()):
+        lines = []
+        with self._lock:
+            for name, (help_text, _) in self.METRICS.items():
+                lines.append(f'# HELP fitforge_{name} {help_text}')
+                lines.append(f'# TYPE fitforge_{name} histogram')
+                for (metric, method, route), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    labels = f'method="{method}",route="{route}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'fitforge_{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'fitforge_{name}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'fitforge_{name}_count{{{labels}}} {histogram.count}')
+        for name, kind, help_text, value in extra:
+            lines.append(f'# HELP fitforge_{name} {help_text}')
+            lines.append(f'# TYPE fitforge_{name} {kind}')
+            lines.append(f'fitforge_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def _stats():
+    if has_request_context():
+        return g.get('perf_stats')
+    return None
+
+
+def record_serialization(seconds):
+    stats = _stats()
+    if stats is not None:
+        stats.serialize_time += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats()
+    if stats is not None:
+        stats._query_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats()
+    if stats is not None and stats._query_started is not None:
+        elapsed = perf_counter() - stats._query_started
+        stats.queries += 1
+        stats.sql_time += elapsed
+        stats.statements.append((elapsed, statement))
+        stats._query_started = None
+
+
+def init_instrumentation(app, extra_metrics=None):
+    """Record per-request SQL count/time, serialization and handler time.
+
+    Enabled by app.config['INSTRUMENTATION']. Timings are sent back in a
+    Server-Timing header, requests slower than SLOW_REQUEST_MS are logged with
+    their statements, and aggregated histograms are served at /metrics.
+    Histograms are kept per process, i.e. per gunicorn worker.
+    """
+    if not app.config.get('INSTRUMENTATION'):
+        return
+    slow_ms = app.config.get('SLOW_REQUEST_MS', 500)
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def record(stats, method, route, full_path):
+        total = perf_counter() - stats.started
+        if route != '/metrics':
+            metrics.observe(method, route, {
+                'request_duration_seconds': total,
+                'sql_duration_seconds': stats.sql_time,
+                'sql_queries': stats.queries,
+                'serialize_duration_seconds': stats.serialize_time,
+            })
+        if total * 1000 >= slow_ms:
+            logger.warning(
+                'Slow request %s %s: %.1fms total, %d queries in %.1fms, serialize %.1fms\n%s',
+                method, full_path, total * 1000, stats.queries,
+                stats.sql_time * 1000, stats.serialize_time * 1000,
+                '\n'.join(f'  {elapsed * 1000:.2f}ms {statement}' for elapsed, statement in stats.statements),
+            )
+        return total
+
+    @app.before_request
+    def start_request_stats():
+        g.perf_stats = RequestStats()
+
+    @app.after_request
+    def finish_request_stats(response):
+        stats = g.get('perf_stats')
+        if stats is None:
+            return response
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        if response.is_streamed:
+            # A stream_with_context body runs its queries after this hook, with
+            # perf_stats still in g; it is recorded once the body is closed.
+            # Its headers are already sent by then, so there is no Server-Timing.
+            method, full_path = request.method, request.full_path
+            response.call_on_close(lambda: record(stats, method, route, full_path))
+            return response
+        g.pop('perf_stats')
+        total = record(stats, request.method, route, request.full_path)
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats.sql_time * 1000:.2f};desc="{stats.queries} queries", '
+            f'ser;dur={stats.serialize_time * 1000:.2f}, '
+            f'app;dur={total * 1000:.2f}'
+        )
+        return response
+
+    def metrics_view():
+        extra = extra_metrics() if extra_metrics else ()
+        return Response(metrics.render(extra), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,34 @@
+"""add catalog versions
+
+Revision ID: 5ae7ee3e327a
+Revises: 9d9eba5e95e0
+Create Date: 2026-10-18 09:12:44.310582
+
+"""
+import time
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5ae7ee3e327a'
+down_revision = '9d9eba5e95e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    catalog_versions = op.create_table('catalog_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(catalog_versions, [
+        {'name': name, 'version': int(time.time())}
+        for name in ('exercises', 'instructors', 'workouts')
+    ])
+
+
+def downgrade():
+    op.drop_table('catalog_versions')
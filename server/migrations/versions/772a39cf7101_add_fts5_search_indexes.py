@@ -0,0 +1,33 @@
+"""add fts5 search indexes
+
+Revision ID: 772a39cf7101
+Revises: 5ae7ee3e327a
+Create Date: 2026-10-18 11:02:17.845120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '772a39cf7101'
+down_revision = '5ae7ee3e327a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite only; other databases use the LIKE fallback in search.py
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("CREATE VIRTUAL TABLE exercises_fts USING fts5(name, instructions, tokenize='porter unicode61')")
+    op.execute("INSERT INTO exercises_fts (rowid, name, instructions) SELECT id, name, instructions FROM exercises")
+    op.execute("CREATE VIRTUAL TABLE workouts_fts USING fts5(name, description, tokenize='porter unicode61')")
+    op.execute("INSERT INTO workouts_fts (rowid, name, description) SELECT id, name, description FROM workouts")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TABLE workouts_fts")
+    op.execute("DROP TABLE exercises_fts")
@@ -1,9 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy_serializer import SerializerMixin
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from replica import RoutingSession
 
-db = SQLAlchemy()
+# GET requests read through the 'replica' bind when one is configured
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Instructor(db.Model, SerializerMixin):
     __tablename__ = 'instructors'
@@ -15,9 +18,14 @@ class Instructor(db.Model, SerializerMixin):
     specialty = db.Column(db.String(100), nullable=False)
     bio = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     exercises = db.relationship('Exercise', backref='instructor', lazy=True)
     workouts = db.relationship('Workout', backref='instructor', lazy=True)
+    
+    @classmethod
+    def serialize_options(cls, loader=selectinload):
+        return ()
 
 class User(db.Model, SerializerMixin):
     __tablename__ = 'users'
@@ -31,10 +39,15 @@ class User(db.Model, SerializerMixin):
     fitness_level = db.Column(db.String(20), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     workouts = db.relationship('Workout', backref='user', lazy=True, cascade='all, delete-orphan')
     user_exercises = db.relationship('UserExercise', backref='user', lazy=True, cascade='all, delete-orphan')
     
+    @classmethod
+    def serialize_options(cls, loader=selectinload):
+        return ()
+    
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
     
@@ -48,30 +61,59 @@ class Exercise(db.Model, SerializerMixin):
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
-    muscle_group = db.Column(db.String(50), nullable=False)
-    difficulty = db.Column(db.String(20), nullable=False)
+    category = db.Column(db.String(50), nullable=False, index=True)
+    muscle_group = db.Column(db.String(50), nullable=False, index=True)
+    difficulty = db.Column(db.String(20), nullable=False, index=True)
     instructions = db.Column(db.Text, nullable=False)
-    instructor_id = db.Column(db.Integer, db.ForeignKey('instructors.id'), nullable=False)
+    instructor_id = db.Column(db.Integer, db.ForeignKey('instructors.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     workout_exercises = db.relationship('WorkoutExercise', backref='exercise', lazy=True, cascade='all, delete-orphan')
     user_exercises = db.relationship('UserExercise', backref='exercise', lazy=True, cascade='all, delete-orphan')
+    
+    # Eager loads matching serialize_rules: to_dict() emits the instructor
+    @classmethod
+    def serialize_options(cls, loader=selectinload):
+        return (loader(cls.instructor),)
 
 class Workout(db.Model, SerializerMixin):
     __tablename__ = 'workouts'
     
     serialize_rules = ('-user.workouts', '-user.user_exercises', '-workout_exercises', '-instructor.workouts')
     
+    # Instructor templates (user_id IS NULL) are listed by GET /workouts
+    __table_args__ = (
+        db.Index('ix_workouts_templates_instructor_id', 'instructor_id',
+                 sqlite_where=db.text('user_id IS NULL'), postgresql_where=db.text('user_id IS NULL')),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     duration = db.Column(db.Integer, nullable=False)  # in minutes
-    instructor_id = db.Column(db.Integer, db.ForeignKey('instructors.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # For user's personal workouts
+    instructor_id = db.Column(db.Integer, db.ForeignKey('instructors.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)  # For user's personal workouts
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    workout_exercises = db.relationship('WorkoutExercise', backref='workout', lazy=True, cascade='all, delete-orphan')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    workout_exercises = db.relationship('WorkoutExercise', backref='workout', lazy=True, cascade='all, delete-orphan',
+                                        order_by='WorkoutExercise.id')
+    
+    # to_dict() emits user and instructor
+    @classmethod
+    def serialize_options(cls, loader=selectinload):
+        return (loader(cls.user), loader(cls.instructor))
+    
+    # Workout, its ordered exercise rows, their exercises and instructors in two SELECTs
+    @classmethod
+    def detail_options(cls):
+        return (
+            *cls.serialize_options(joinedload),
+            selectinload(cls.workout_exercises)
+                .joinedload(WorkoutExercise.exercise)
+                .joinedload(Exercise.instructor),
+        )
 
 class WorkoutExercise(db.Model, SerializerMixin):
     __tablename__ = 'workout_exercises'
@@ -79,21 +121,129 @@ class WorkoutExercise(db.Model, SerializerMixin):
     serialize_rules = ('-workout.workout_exercises', '-exercise.workout_exercises')
     
     id = db.Column(db.Integer, primary_key=True)
-    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id'), nullable=False)
-    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=False)
+    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id'), nullable=False, index=True)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=False, index=True)
     sets = db.Column(db.Integer, nullable=False)
     reps = db.Column(db.Integer, nullable=False)
     weight = db.Column(db.Float)  # user submittable attribute
     rest_time = db.Column(db.Integer)  # in seconds, user submittable attribute
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # to_dict() emits workout (with its user and instructor) and exercise (with its instructor)
+    @classmethod
+    def serialize_options(cls, loader=selectinload):
+        return (
+            loader(cls.workout).options(*Workout.serialize_options(loader)),
+            loader(cls.exercise).options(*Exercise.serialize_options(loader)),
+        )
 
 class UserExercise(db.Model, SerializerMixin):
     __tablename__ = 'user_exercises'
     
     serialize_rules = ('-user.user_exercises', '-exercise.user_exercises')
     
+    # An exercise can be in a user's profile once; also serves lookups by user_id
+    __table_args__ = (
+        db.Index('uq_user_exercises_user_id_exercise_id', 'user_id', 'exercise_id', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=False)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=False, index=True)
     personal_record = db.Column(db.Float)  # user submittable attribute
     notes = db.Column(db.Text)  # user submittable attribute
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # to_dict() emits user and exercise (with its instructor)
+    @classmethod
+    def serialize_options(cls, loader=selectinload):
+        return (
+            loader(cls.user),
+            loader(cls.exercise).options(*Exercise.serialize_options(loader)),
+        )
+
+class WorkoutSession(db.Model, SerializerMixin):
+    __tablename__ = 'workout_sessions'
+    
+    serialize_rules = ('-set_logs',)
+    
+    __table_args__ = (
+        db.Index('ix_workout_sessions_user_id_started_at', 'user_id', 'started_at'),
+        db.Index('ix_workout_sessions_workout_id', 'workout_id'),  # detached when the workout is deleted
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id'))  # the plan followed, if any
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    ended_at = db.Column(db.DateTime)
+    notes = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Read-only: set logs are written and deleted in bulk with Core statements
+    # (tracking.py), never one object at a time
+    set_logs = db.relationship('SetLog', viewonly=True, order_by='SetLog.id')
+    
+    @classmethod
+    def serialize_options(cls, loader=selectinload):
+        return ()
+
+class SetLog(db.Model, SerializerMixin):
+    __tablename__ = 'set_logs'
+    
+    serialize_rules = ()
+    
+    # Append-only and written in batches, so only the indexes reads need:
+    # sets of a session, a user's history per exercise, and client_id for
+    # idempotent retries (NULLs never conflict); plus exercise_id for
+    # deleting an exercise's sets
+    __table_args__ = (
+        db.Index('ix_set_logs_session_id', 'session_id'),
+        db.Index('ix_set_logs_exercise_id', 'exercise_id'),
+        db.Index('ix_set_logs_user_id_exercise_id_performed_at', 'user_id', 'exercise_id', 'performed_at'),
+        db.Index('uq_set_logs_user_id_client_id', 'user_id', 'client_id', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('workout_sessions.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # copied from the session
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), nullable=False)
+    reps = db.Column(db.Integer, nullable=False)
+    weight = db.Column(db.Float)
+    performed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    client_id = db.Column(db.String(64))  # set by the device; retries with the same id are ignored
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @classmethod
+    def serialize_options(cls, loader=selectinload):
+        return ()
+
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_versions'
+    
+    # One row per table; bumped in the same transaction as each write so
+    # ETags stay consistent across gunicorn workers
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class ChangeLog(db.Model):
+    __tablename__ = 'change_log'
+    
+    # One row per created, updated or deleted row of a synced table; the id is
+    # the /sync cursor. user_id is the owner for personal rows, NULL for the
+    # shared catalog
+    __table_args__ = (
+        db.Index('ix_change_log_user_id_id', 'user_id', 'id'),
+        # Never reuse ids, even after old entries are pruned (prune-changes)
+        {'sqlite_autoincrement': True},
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer)
+    op = db.Column(db.String(10), nullable=False)  # 'upsert' or 'delete'
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
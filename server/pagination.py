@@ -0,0 +1,189 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+MAX_IDS = 100
+
+Page = namedtuple('Page', 'items next_cursor paginated')
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def _column(model, name):
+    return model.__table__.columns[name]
+
+
+def _coerce(column, raw):
+    python_type = column.type.python_type
+    if python_type is bool:
+        if raw.lower() in ('1', 'true', 'yes'):
+            return True
+        if raw.lower() in ('0', 'false', 'no'):
+            return False
+        raise PaginationError(f'Invalid value for {column.name}: {raw}')
+    if python_type is datetime:
+        try:
+            return datetime.fromisoformat(raw)
+        except ValueError:
+            raise PaginationError(f'Invalid value for {column.name}: {raw}')
+    try:
+        return python_type(raw)
+    except (TypeError, ValueError):
+        raise PaginationError(f'Invalid value for {column.name}: {raw}')
+
+
+def apply_filters(query, model, args, filters):
+    # ?difficulty=Beginner,Intermediate matches either value
+    for name in filters:
+        raw = args.get(name)
+        if raw is None or raw == '':
+            continue
+        column = _column(model, name)
+        values = [_coerce(column, value) for value in raw.split(',')]
+        if len(values) == 1:
+            query = query.filter(column == values[0])
+        else:
+            query = query.filter(column.in_(values))
+    return query
+
+
+def parse_sort(args, sorts, default='id'):
+    sort = args.get('sort') or default
+    key = sort[1:] if sort.startswith('-') else sort
+    if key not in sorts:
+        raise PaginationError(f"Invalid sort key: {key}. Allowed: {', '.join(sorts)}")
+    return key, sort.startswith('-')
+
+
+def parse_limit(args):
+    raw = args.get('limit')
+    if raw is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    if limit < 1 or limit > MAX_LIMIT:
+        raise PaginationError(f'limit must be between 1 and {MAX_LIMIT}')
+    return limit
+
+
+def parse_ids(raw, max_ids=MAX_IDS):
+    try:
+        ids = [int(part) for part in raw.split(',') if part.strip()]
+    except ValueError:
+        raise PaginationError('ids must be a comma-separated list of integers')
+    if not ids:
+        raise PaginationError('ids must not be empty')
+    if len(ids) > max_ids:
+        raise PaginationError(f'At most {max_ids} ids per request')
+    return ids
+
+
+def encode_cursor(sort, value, last_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({'s': sort, 'v': value, 'id': last_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _cursor_value(column, value):
+    # Cursors come back from clients: only a scalar of the column's type may
+    # reach the query
+    if value is None:
+        return None
+    if isinstance(value, (list, dict)):
+        raise ValueError('cursor value must be a scalar')
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is bool and not isinstance(value, bool):
+        raise ValueError('cursor value must be a boolean')
+    return python_type(value)
+
+
+def decode_cursor(cursor, sort, column):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_sort, value, last_id = payload['s'], payload['v'], int(payload['id'])
+        value = _cursor_value(column, value)
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise PaginationError('Invalid cursor')
+    if cursor_sort != sort:
+        raise PaginationError('cursor does not match sort')
+    return value, last_id
+
+
+def _after(column, id_column, value, last_id, descending):
+    """Rows after (value, last_id) in the order _filter_and_sort applies.
+
+    SQLite sorts NULLs lowest: first ascending, last descending. A NULL
+    sort value can't be compared with < or >, so it gets its own branch.
+    """
+    if descending:
+        if value is None:
+            return and_(column.is_(None), id_column < last_id)
+        return or_(column < value, and_(column == value, id_column < last_id), column.is_(None))
+    if value is None:
+        return or_(column.is_not(None), and_(column.is_(None), id_column > last_id))
+    return or_(column > value, and_(column == value, id_column > last_id))
+
+
+def _filter_and_sort(query, model, args, filters, sorts, default_sort):
+    query = apply_filters(query, model, args, filters)
+    key, descending = parse_sort(args, sorts, default_sort)
+    id_column = _column(model, 'id')
+    column = _column(model, key)
+
+    if descending:
+        query = query.order_by(column.desc(), id_column.desc()) if key != 'id' else query.order_by(id_column.desc())
+    else:
+        query = query.order_by(column.asc(), id_column.asc()) if key != 'id' else query.order_by(id_column.asc())
+    return query, key, descending
+
+
+def filter_and_sort(query, model, args, filters=(), sorts=('id',), default_sort='id'):
+    """Apply ?filters and ?sort without paginating."""
+    return _filter_and_sort(query, model, args, filters, sorts, default_sort)[0]
+
+
+def paginate(query, model, args, filters=(), sorts=('id',), default_sort='id'):
+    """Apply ?filters, ?sort and keyset pagination (?limit/?cursor) to query.
+
+    Pages are keyed on (sort column, id) so each page is an index range scan
+    regardless of its depth. Without limit or cursor every matching row is
+    returned, as the list endpoints always have.
+    """
+    query, key, descending = _filter_and_sort(query, model, args, filters, sorts, default_sort)
+    sort = ('-' if descending else '') + key
+    id_column = _column(model, 'id')
+    column = _column(model, key)
+
+    if 'limit' not in args and 'cursor' not in args:
+        return Page(query.all(), None, False)
+
+    limit = parse_limit(args)
+    cursor = args.get('cursor')
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, column)
+        if key == 'id':
+            query = query.filter(id_column < last_id if descending else id_column > last_id)
+        else:
+            query = query.filter(_after(column, id_column, value, last_id, descending))
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, getattr(last, key), last.id)
+    return Page(rows, next_cursor, True)
@@ -0,0 +1,148 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.pool import NullPool
+
+try:
+    import fcntl
+except ImportError:  # Windows: snapshots are not coordinated between processes
+    fcntl = None
+
+logger = logging.getLogger('fitforge.replica')
+
+REPLICA = 'replica'
+READ_METHODS = ('GET', 'HEAD')
+PIN_KEY = 'primary_until'
+
+
+def _reading():
+    return has_request_context() and g.get('read_replica', False)
+
+
+class RoutingSession(Session):
+    """Send SELECTs issued while handling a GET to the 'replica' bind.
+
+    Flushes, writes, raw connections and anything outside a read request use
+    the primary. Without a replica bind this behaves like the default session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _reading() and getattr(clause, 'is_select', False):
+            engine = self._db.engines.get(REPLICA)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class SnapshotReplica:
+    """A read-only copy of a SQLite database refreshed every interval seconds.
+
+    Stands in for a real replica on a single host. The copy is made with the
+    SQLite backup API into a temp file and swapped in with os.replace, so
+    readers see either the old or the new snapshot. A lock file keeps
+    gunicorn workers from copying at the same time.
+    """
+
+    def __init__(self, source, path, interval):
+        self.source = source
+        self.path = path
+        self.interval = interval
+        self._pid = None
+
+    @property
+    def url(self):
+        return f'sqlite:///file:{self.path}?mode=ro&uri=true'
+
+    def age(self):
+        try:
+            return time.time() - os.path.getmtime(self.path)
+        except OSError:
+            return float('inf')
+
+    def refresh(self, wait=False):
+        """Take a new snapshot if the current one is stale; returns whether one was taken."""
+        with open(self.path + '.lock', 'w') as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False  # another worker is copying
+            # Another worker may have refreshed while we waited
+            if self.age() < self.interval / 2:
+                return False
+            temp_path = f'{self.path}.{os.getpid()}.tmp'
+            source = sqlite3.connect(self.source, timeout=30)
+            target = sqlite3.connect(temp_path)
+            try:
+                source.backup(target)
+                # Readers open it read-only, which a WAL database does not allow
+                target.execute('PRAGMA journal_mode = DELETE')
+            finally:
+                target.close()
+                source.close()
+            os.replace(temp_path, self.path)
+            return True
+
+    def start(self):
+        # Threads do not survive fork, so each gunicorn worker starts its own
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._run, name='replica-snapshot', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Refreshing the replica snapshot failed')
+
+
+def replica_bind(app, url):
+    """SQLALCHEMY_BINDS entry for app.config['READ_REPLICA'], or None.
+
+    READ_REPLICA is a database URL, or 'snapshot' for a SQLite copy of the
+    primary under instance/ refreshed every REPLICA_REFRESH_SECONDS.
+    """
+    replica = app.config.get('READ_REPLICA')
+    if not replica:
+        return None, None
+    if replica != 'snapshot':
+        return {'url': replica, 'pool_pre_ping': True}, None
+
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        raise ValueError('READ_REPLICA=snapshot needs a SQLite file database')
+    source = url.database
+    if not os.path.isabs(source):
+        source = os.path.join(app.instance_path, source)
+    os.makedirs(app.instance_path, exist_ok=True)
+    path = app.config.get('REPLICA_SNAPSHOT_PATH') or os.path.join(app.instance_path, 'fitforge-replica.db')
+    snapshot = SnapshotReplica(source, path, app.config.get('REPLICA_REFRESH_SECONDS', 5))
+    snapshot.refresh(wait=True)
+    # A fresh connection per checkout so a swapped-in snapshot is seen right away
+    return {'url': snapshot.url, 'poolclass': NullPool}, snapshot
+
+
+def init_replica(app, snapshot=None):
+    """Route GETs to the replica, except for a client that wrote within
+    REPLICA_PIN_SECONDS: its session cookie pins it to the primary so it
+    reads its own writes."""
+    pin_seconds = app.config.get('REPLICA_PIN_SECONDS', 2 * app.config.get('REPLICA_REFRESH_SECONDS', 5))
+
+    @app.before_request
+    def route_reads():
+        if snapshot is not None:
+            snapshot.start()
+        g.read_replica = request.method in READ_METHODS and session.get(PIN_KEY, 0) <= time.time()
+
+    @app.after_request
+    def pin_writers(response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            session[PIN_KEY] = time.time() + pin_seconds
+        return response
@@ -0,0 +1,128 @@
+import zlib
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import brotli
+import orjson
+from flask import make_response, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy_serializer import SerializerMixin
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/plain', 'text/html')
+ENCODINGS = ('br', 'gzip')  # in order of preference
+# Non-str keys: facet counts are keyed by instructor_id
+_ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    # Same formats as SerializerMixin.to_dict, for values that reach the
+    # encoder without going through a serializer
+    if isinstance(obj, datetime):
+        return obj.strftime(SerializerMixin.datetime_format)
+    if isinstance(obj, date):
+        return obj.strftime(SerializerMixin.date_format)
+    if isinstance(obj, time):
+        return obj.strftime(SerializerMixin.time_format)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(obj, sort_keys=False):
+    """Encode obj as JSON bytes."""
+    option = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _ORJSON_OPTIONS
+    return orjson.dumps(obj, default=_default, option=option)
+
+
+loads = orjson.loads
+
+
+def output_json(data, code, headers=None):
+    """flask-restful representation for application/json."""
+    response = make_response(dumps(data), code)
+    response.mimetype = 'application/json'
+    response.headers.extend(headers or {})
+    return response
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """app.json for plain views (jsonify and returned dicts)."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys)).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, sort_keys=self.sort_keys), mimetype=self.mimetype)
+
+
+class _Compressor:
+    def __init__(self, encoding, level):
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=level)
+            self.compress, self._finish = self._compressor.process, self._compressor.finish
+        else:
+            # wbits 31: gzip container
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self.compress, self._finish = self._compressor.compress, self._compressor.flush
+
+    def finish(self):
+        return self._finish()
+
+
+def _compress_stream(chunks, compressor):
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def init_compression(app):
+    """Compress responses with the best encoding the client accepts.
+
+    Bodies smaller than COMPRESS_MIN_SIZE are sent as is; streamed bodies
+    are always compressed, chunk by chunk. The encoding is appended to a
+    strong ETag so each representation keeps a distinct validator.
+    """
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    levels = {'gzip': app.config.get('COMPRESS_GZIP_LEVEL', 6), 'br': app.config.get('COMPRESS_BR_LEVEL', 4)}
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code < 200 or response.status_code >= 300 or response.status_code == 204
+                or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(ENCODINGS)
+        if encoding is None or request.method == 'HEAD':
+            return response
+
+        compressor = _Compressor(encoding, levels[encoding])
+        if response.is_streamed:
+            response.response = _compress_stream(response.iter_encoded(), compressor)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compressor.compress(data) + compressor.finish())
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak)
+        return response
+
+
+def init_representations(app, api):
+    """Use the fast encoder for flask-restful resources and plain views, and
+    compress responses. FAST_JSON=False keeps the stdlib representations."""
+    if app.config.get('FAST_JSON', True):
+        api.representations['application/json'] = output_json
+        app.json = FastJSONProvider(app)
+    if app.config.get('COMPRESSION', True):
+        init_compression(app)
@@ -1,13 +1,77 @@
-from flask import request, session
+from datetime import datetime
+
+from flask import Response, request, session, stream_with_context
 from flask_restful import Resource
-from models import db, User, Exercise, Workout, WorkoutExercise, UserExercise, Instructor
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+from models import db, User, Exercise, Workout, WorkoutExercise, UserExercise, Instructor, WorkoutSession
+from pagination import filter_and_sort, paginate, parse_ids, parse_limit, parse_sort, PaginationError
+from serializers import serialize, serialize_many
+from conditional import conditional, bump_versions
+from cache import catalog_cache
+from search import search_ids
+from facets import exercise_facets
+from streaming import stream_response, wants_stream
+from fieldsets import parse_fields, project, query_options
+from sync import DELETE, UPSERT, SyncError, changes_since, latest_cursor, parse_cursor, record_changes
+from tracking import delete_set_logs, detach_workout_sessions, log_sets, parse_datetime, validate_set_logs
+from analytics import AnalyticsError, parse_options, progress, training_query
+from transfer import Importer, TransferError, TRANSFER_TABLES, IMPORT_CHUNK_SIZE, export_lines, finish_import
+
+def list_response(query, model, filters=(), sorts=('id', 'created_at')):
+    # ?fields=id,name selects only those columns, plus the sort column for
+    # the next cursor
+    fields = parse_fields(model, request.args)
+    sort_key, _ = parse_sort(request.args, sorts)
+    query = query.options(*query_options(model, fields, extra=(sort_key,)))
+    if 'ids' in request.args:
+        return multi_get_response(query, model, request.args['ids'], fields)
+    if wants_stream(request.args):
+        # ?stream=1 writes the whole filtered list incrementally
+        if 'limit' in request.args or 'cursor' in request.args:
+            raise PaginationError('stream cannot be combined with limit or cursor')
+        return stream_response(filter_and_sort(query, model, request.args, filters, sorts),
+                               serialize_row=lambda row: serialize(row, fields=fields))
+    page = paginate(query, model, request.args, filters, sorts)
+    items = serialize_many(page.items, fields=fields)
+    if page.paginated:
+        return {'items': items, 'next_cursor': page.next_cursor}
+    return items
+
+def not_found(id):
+    return {'id': id, 'error': 'Not found'}
+
+def search_response(model, templates_only=False):
+    q = request.args.get('q', '').strip()
+    if not q:
+        return {'error': 'q is required'}, 400
+    try:
+        limit = parse_limit(request.args)
+        fields = parse_fields(model, request.args)
+    except PaginationError as e:
+        return {'error': str(e)}, 400
+    ids = search_ids(model, q, limit, templates_only=templates_only)
+    objs = model.query.options(*query_options(model, fields)).filter(model.id.in_(ids)).all() if ids else []
+    by_id = {obj.id: obj for obj in objs}
+    return serialize_many((by_id[id] for id in ids if id in by_id), fields=fields)
+
+def multi_get_response(query, model, raw_ids, fields=None):
+    # ?ids=3,1,2 -> one IN query, results in requested order
+    ids = parse_ids(raw_ids)
+    objs = query.filter(model.id.in_(ids)).all()
+    by_id = {data['id']: data for data in serialize_many(objs, fields=fields)}
+    return [by_id.get(id, not_found(id)) for id in ids]
 
 # User Resources
 class UserListResource(Resource):
     def get(self):
         try:
-            users = User.query.all()
-            return [user.to_dict() for user in users]
+            return list_response(User.query, User,
+                                 filters=('fitness_level', 'is_admin'),
+                                 sorts=('id', 'created_at', 'name'))
+        except PaginationError as e:
+            return {'error': str(e)}, 400
         except Exception as e:
             return {'error': str(e)}, 500
     
@@ -16,12 +80,16 @@ class UserListResource(Resource):
         user = User(**data)
         db.session.add(user)
         db.session.commit()
-        return user.to_dict(), 201
+        return serialize(user), 201
 
 class UserResource(Resource):
     def get(self, id):
-        user = User.query.get_or_404(id)
-        return user.to_dict()
+        try:
+            fields = parse_fields(User, request.args)
+        except PaginationError as e:
+            return {'error': str(e)}, 400
+        user = User.query.options(*query_options(User, fields)).get_or_404(id)
+        return serialize(user, fields=fields)
     
     def patch(self, id):
         user = User.query.get_or_404(id)
@@ -29,20 +97,27 @@ class UserResource(Resource):
         for key, value in data.items():
             setattr(user, key, value)
         db.session.commit()
-        return user.to_dict()
+        return serialize(user)
     
     def delete(self, id):
         user = User.query.get_or_404(id)
+        delete_set_logs(user_id=id)
+        # Only the user's personal workouts go with them, never templates,
+        # so the catalog versions are unchanged
         db.session.delete(user)
         db.session.commit()
         return '', 204
 
 # Exercise Resources
 class ExerciseListResource(Resource):
+    @conditional('exercises', 'instructors')
     def get(self):
         try:
-            exercises = Exercise.query.all()
-            return [exercise.to_dict() for exercise in exercises]
+            return list_response(Exercise.query, Exercise,
+                                 filters=('category', 'muscle_group', 'difficulty', 'instructor_id'),
+                                 sorts=('id', 'created_at', 'name'))
+        except PaginationError as e:
+            return {'error': str(e)}, 400
         except Exception as e:
             return {'error': str(e)}, 500
     
@@ -50,34 +125,82 @@ class ExerciseListResource(Resource):
         data = request.get_json()
         exercise = Exercise(**data)
         db.session.add(exercise)
+        versions = bump_versions('exercises')
         db.session.commit()
-        return exercise.to_dict(), 201
+        exercise_facets.apply(exercise.id, exercise, versions['exercises'])
+        return serialize(exercise), 201
+
+class ExerciseSearchResource(Resource):
+    @conditional('exercises', 'instructors')
+    def get(self):
+        return search_response(Exercise)
+
+class ExerciseFacetsResource(Resource):
+    @conditional('exercises')
+    def get(self):
+        selected = {}
+        for facet in exercise_facets.facets:
+            raw = request.args.get(facet)
+            if not raw:
+                continue
+            values = raw.split(',')
+            if facet == 'instructor_id':
+                try:
+                    values = [int(value) for value in values]
+                except ValueError:
+                    return {'error': 'instructor_id must be an integer'}, 400
+            selected[facet] = set(values)
+        try:
+            limit = parse_limit(request.args)
+        except PaginationError as e:
+            return {'error': str(e)}, 400
+        
+        exercise_facets.ensure_current()
+        total, ids, counts = exercise_facets.query(selected, limit)
+        return {'total': total, 'ids': ids, 'facets': counts}
 
 class ExerciseResource(Resource):
+    @conditional('exercises', 'instructors')
     def get(self, id):
-        exercise = Exercise.query.get_or_404(id)
-        return exercise.to_dict()
+        try:
+            fields = parse_fields(Exercise, request.args)
+        except PaginationError as e:
+            return {'error': str(e)}, 400
+        # The cache holds the full representation; ?fields narrows a copy
+        return project(catalog_cache.get_or_load('exercise', id, lambda: serialize(
+            Exercise.query.options(*Exercise.serialize_options(joinedload)).get_or_404(id)
+        ), versions=('exercises', 'instructors')), fields)
     
     def patch(self, id):
         exercise = Exercise.query.get_or_404(id)
         data = request.get_json()
         for key, value in data.items():
             setattr(exercise, key, value)
+        versions = bump_versions('exercises')
         db.session.commit()
-        return exercise.to_dict()
+        exercise_facets.apply(id, exercise, versions['exercises'])
+        return serialize(exercise)
     
     def delete(self, id):
         exercise = Exercise.query.get_or_404(id)
+        delete_set_logs(exercise_id=id)
         db.session.delete(exercise)
+        versions = bump_versions('exercises')
         db.session.commit()
+        exercise_facets.apply(id, None, versions['exercises'])
         return '', 204
 
 # Workout Resources
 class WorkoutListResource(Resource):
+    @conditional('workouts', 'instructors')
     def get(self):
         try:
-            workouts = Workout.query.filter(Workout.user_id.is_(None)).all()
-            return [workout.to_dict() for workout in workouts]
+            query = Workout.query.filter(Workout.user_id.is_(None))
+            return list_response(query, Workout,
+                                 filters=('instructor_id', 'duration'),
+                                 sorts=('id', 'created_at', 'name', 'duration'))
+        except PaginationError as e:
+            return {'error': str(e)}, 400
         except Exception as e:
             return {'error': str(e)}, 500
     
@@ -93,14 +216,26 @@ class WorkoutListResource(Resource):
             workout = Workout(**data)
             db.session.add(workout)
             db.session.commit()
-            return workout.to_dict(), 201
+            return serialize(workout), 201
         except Exception as e:
             return {'error': str(e)}, 400
 
+class WorkoutSearchResource(Resource):
+    @conditional('workouts', 'instructors')
+    def get(self):
+        # Searches the public templates, like GET /workouts
+        return search_response(Workout, templates_only=True)
+
 class WorkoutResource(Resource):
     def get(self, id):
-        workout = Workout.query.get_or_404(id)
-        return workout.to_dict()
+        try:
+            fields = parse_fields(Workout, request.args)
+        except PaginationError as e:
+            return {'error': str(e)}, 400
+        # Only instructor templates are shared between users, so only they are cached
+        return project(catalog_cache.get_or_load('workout', id, lambda: serialize(
+            Workout.query.options(*Workout.serialize_options(joinedload)).get_or_404(id)
+        ), versions=('workouts', 'instructors'), cacheable=lambda data: data['user_id'] is None), fields)
     
     def patch(self, id):
         workout = Workout.query.get_or_404(id)
@@ -111,11 +246,16 @@ class WorkoutResource(Resource):
         if workout.user_id != session['user_id'] and not user.is_admin:
             return {'error': 'Not authorized'}, 403
             
+        # Personal workouts are not part of the catalog, so only template
+        # changes (including becoming or ceasing to be one) bump its version
+        was_template = workout.user_id is None
         data = request.get_json()
         for key, value in data.items():
             setattr(workout, key, value)
+        if was_template or workout.user_id is None:
+            bump_versions('workouts')
         db.session.commit()
-        return workout.to_dict()
+        return serialize(workout)
     
     def delete(self, id):
         workout = Workout.query.get_or_404(id)
@@ -126,10 +266,33 @@ class WorkoutResource(Resource):
         if workout.user_id != session['user_id'] and not user.is_admin:
             return {'error': 'Not authorized'}, 403
             
+        detach_workout_sessions(id)
         db.session.delete(workout)
+        if workout.user_id is None:
+            bump_versions('workouts')
         db.session.commit()
         return '', 204
 
+def serialize_workout_detail(workout):
+    data = serialize(workout)
+    data['workout_exercises'] = serialize_many(workout.workout_exercises, rules=('-workout',))
+    return data
+
+class WorkoutDetailResource(Resource):
+    def get(self, id):
+        workout = Workout.query.options(*Workout.detail_options()).get_or_404(id)
+        return serialize_workout_detail(workout)
+
+class WorkoutDetailListResource(Resource):
+    def get(self):
+        try:
+            ids = parse_ids(request.args.get('ids', ''), max_ids=50)
+        except PaginationError as e:
+            return {'error': str(e)}, 400
+        workouts = Workout.query.options(*Workout.detail_options()).filter(Workout.id.in_(ids)).all()
+        by_id = {workout.id: serialize_workout_detail(workout) for workout in workouts}
+        return [by_id.get(id, not_found(id)) for id in ids]
+
 # WorkoutExercise Resources
 class WorkoutExerciseListResource(Resource):
     def post(self):
@@ -137,7 +300,7 @@ class WorkoutExerciseListResource(Resource):
         workout_exercise = WorkoutExercise(**data)
         db.session.add(workout_exercise)
         db.session.commit()
-        return workout_exercise.to_dict(), 201
+        return serialize(workout_exercise), 201
 
 class WorkoutExerciseResource(Resource):
     def patch(self, id):
@@ -146,7 +309,155 @@ class WorkoutExerciseResource(Resource):
         for key, value in data.items():
             setattr(workout_exercise, key, value)
         db.session.commit()
-        return workout_exercise.to_dict()
+        return serialize(workout_exercise)
+
+MAX_BULK_WORKOUT_EXERCISES = 100
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def validate_workout_exercises(entries, workout_id, allow_empty=False):
+    # PUT [] clears a workout; POST [] would do nothing
+    if not isinstance(entries, list) or not (entries or allow_empty):
+        return None, [{'error': 'Expected a non-empty JSON array of exercises'}]
+    if len(entries) > MAX_BULK_WORKOUT_EXERCISES:
+        return None, [{'error': f'At most {MAX_BULK_WORKOUT_EXERCISES} exercises per request'}]
+
+    rows, errors = [], []
+    allowed = {'exercise_id', 'sets', 'reps', 'weight', 'rest_time'}
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            errors.append({'index': index, 'error': 'Expected an object'})
+            continue
+        problems = []
+        unknown = set(entry) - allowed
+        if unknown:
+            problems.append(f"Unknown fields: {', '.join(sorted(unknown))}")
+        if not _is_int(entry.get('exercise_id')):
+            problems.append('exercise_id is required and must be an integer')
+        for field in ('sets', 'reps'):
+            if not _is_int(entry.get(field)) or entry[field] < 1:
+                problems.append(f'{field} is required and must be a positive integer')
+        weight = entry.get('weight')
+        if weight is not None and (isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0):
+            problems.append('weight must be a non-negative number')
+        rest_time = entry.get('rest_time')
+        if rest_time is not None and (not _is_int(rest_time) or rest_time < 0):
+            problems.append('rest_time must be a non-negative integer')
+        if problems:
+            errors.append({'index': index, 'error': '; '.join(problems)})
+            continue
+        rows.append({
+            'workout_id': workout_id,
+            'exercise_id': entry['exercise_id'],
+            'sets': entry['sets'],
+            'reps': entry['reps'],
+            'weight': weight,
+            'rest_time': rest_time,
+        })
+
+    if rows and not errors:
+        # One IN query validates every referenced exercise
+        requested = {row['exercise_id'] for row in rows}
+        found = set(db.session.scalars(db.select(Exercise.id).where(Exercise.id.in_(requested))))
+        for index, row in enumerate(rows):
+            if row['exercise_id'] not in found:
+                errors.append({'index': index, 'error': f"Exercise {row['exercise_id']} not found"})
+    return rows, errors
+
+class WorkoutExerciseBulkResource(Resource):
+    def post(self, id):
+        return self._write(id, replace=False)
+    
+    def put(self, id):
+        return self._write(id, replace=True)
+    
+    def _write(self, id, replace):
+        workout = Workout.query.get_or_404(id)
+        if 'user_id' not in session:
+            return {'error': 'Not logged in'}, 401
+        
+        user = User.query.get(session['user_id'])
+        if workout.user_id != session['user_id'] and not user.is_admin:
+            return {'error': 'Not authorized'}, 403
+        
+        rows, errors = validate_workout_exercises(request.get_json(silent=True), workout.id, allow_empty=replace)
+        if errors:
+            return {'error': 'Invalid exercises', 'details': errors}, 400
+        
+        try:
+            # Core statements bypass the session's change tracking, so the
+            # change log is written here
+            table = WorkoutExercise.__table__
+            owners = {workout.id: workout.user_id}
+            if replace:
+                removed = db.session.scalars(
+                    delete(table).where(table.c.workout_id == workout.id).returning(table.c.id)
+                ).all()
+                record_changes(db.session.connection(), 'workout_exercises',
+                               [{'id': id, 'workout_id': workout.id} for id in removed], DELETE, owners)
+            added = db.session.scalars(insert(table).returning(table.c.id), rows).all() if rows else []
+            record_changes(db.session.connection(), 'workout_exercises',
+                           [{'id': id, 'workout_id': workout.id} for id in added], UPSERT, owners)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'error': str(e)}, 400
+        
+        workout = Workout.query.options(*Workout.detail_options()).populate_existing().get(workout.id)
+        return serialize_workout_detail(workout), 200 if replace else 201
+
+def copy_workout_exercises(source_id, target_id):
+    """INSERT ... SELECT copying source's exercise rows, in order, to target."""
+    table = WorkoutExercise.__table__
+    now = datetime.utcnow()
+    columns = ('exercise_id', 'sets', 'reps', 'weight', 'rest_time')
+    rows = (
+        select(literal(target_id, db.Integer), *(table.c[name] for name in columns),
+               literal(now, db.DateTime), literal(now, db.DateTime))
+        .where(table.c.workout_id == source_id)
+        .order_by(table.c.id)
+    )
+    return insert(table).from_select(['workout_id', *columns, 'created_at', 'updated_at'], rows).returning(table.c.id)
+
+class WorkoutCloneResource(Resource):
+    def post(self, id):
+        if 'user_id' not in session:
+            return {'error': 'Not logged in'}, 401
+        source = Workout.query.get_or_404(id)
+        # Templates can be cloned by anyone, personal workouts by their owner
+        if source.user_id is not None and source.user_id != session['user_id']:
+            user = User.query.get(session['user_id'])
+            if not user.is_admin:
+                return {'error': 'Not authorized'}, 403
+        
+        data = request.get_json(silent=True) or {}
+        unknown = set(data) - {'name', 'description', 'duration'}
+        if unknown:
+            return {'error': f"Unknown fields: {', '.join(sorted(unknown))}"}, 400
+        
+        try:
+            workout = Workout(
+                name=data.get('name', source.name),
+                description=data.get('description', source.description),
+                duration=data.get('duration', source.duration),
+                instructor_id=source.instructor_id,
+                user_id=session['user_id'],
+            )
+            db.session.add(workout)
+            db.session.flush()
+            # The exercise rows are copied inside the database, however many there are
+            copied = db.session.scalars(copy_workout_exercises(source.id, workout.id)).all()
+            record_changes(db.session.connection(), 'workout_exercises',
+                           [{'id': id, 'workout_id': workout.id} for id in copied], UPSERT,
+                           {workout.id: workout.user_id})
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'error': str(e)}, 400
+        
+        workout = Workout.query.options(*Workout.detail_options()).populate_existing().get(workout.id)
+        return serialize_workout_detail(workout), 201
 
 # UserExercise Resources
 class UserExerciseListResource(Resource):
@@ -154,8 +465,10 @@ class UserExerciseListResource(Resource):
         if 'user_id' not in session:
             return {'error': 'Not logged in'}, 401
         try:
-            user_exercises = UserExercise.query.filter_by(user_id=session['user_id']).all()
-            return [ue.to_dict() for ue in user_exercises]
+            query = UserExercise.query.filter_by(user_id=session['user_id'])
+            return list_response(query, UserExercise, filters=('exercise_id',))
+        except PaginationError as e:
+            return {'error': str(e)}, 400
         except Exception as e:
             return {'error': str(e)}, 500
     
@@ -166,18 +479,17 @@ class UserExerciseListResource(Resource):
             data = request.get_json()
             data['user_id'] = session['user_id']  # Force current user
             
-            existing = UserExercise.query.filter_by(
-                user_id=session['user_id'], 
-                exercise_id=data['exercise_id']
-            ).first()
-            
-            if existing:
-                return {'error': 'Exercise already in your profile'}, 400
-            
+            # uq_user_exercises_user_id_exercise_id rejects duplicates, so no
+            # lookup is needed before the insert
             user_exercise = UserExercise(**data)
             db.session.add(user_exercise)
             db.session.commit()
-            return user_exercise.to_dict(), 201
+            return serialize(user_exercise), 201
+        except IntegrityError as e:
+            db.session.rollback()
+            if 'unique' in str(e.orig).lower():
+                return {'error': 'Exercise already in your profile'}, 400
+            return {'error': str(e)}, 400
         except Exception as e:
             return {'error': str(e)}, 400
 
@@ -195,12 +507,135 @@ class UserExerciseResource(Resource):
         db.session.commit()
         return '', 204
 
+# Workout session Resources
+SESSION_FIELDS = {'workout_id', 'started_at', 'ended_at', 'notes'}
+
+def session_values(data, allowed):
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    unknown = set(data) - allowed
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    values = dict(data)
+    for key in ('started_at', 'ended_at'):
+        if values.get(key) is not None:
+            try:
+                values[key] = parse_datetime(values[key])
+            except ValueError:
+                raise ValueError(f'{key} must be an ISO 8601 datetime')
+    return values
+
+def session_access_error(workout_session):
+    if 'user_id' not in session:
+        return {'error': 'Not logged in'}, 401
+    if workout_session.user_id != session['user_id'] and not User.query.get(session['user_id']).is_admin:
+        return {'error': 'Not authorized'}, 403
+    return None
+
+class WorkoutSessionListResource(Resource):
+    def get(self):
+        if 'user_id' not in session:
+            return {'error': 'Not logged in'}, 401
+        try:
+            query = WorkoutSession.query.filter_by(user_id=session['user_id'])
+            return list_response(query, WorkoutSession, filters=('workout_id',),
+                                 sorts=('id', 'started_at', 'created_at'))
+        except PaginationError as e:
+            return {'error': str(e)}, 400
+        except Exception as e:
+            return {'error': str(e)}, 500
+    
+    def post(self):
+        if 'user_id' not in session:
+            return {'error': 'Not logged in'}, 401
+        try:
+            values = session_values(request.get_json(silent=True) or {}, SESSION_FIELDS)
+            if values.get('workout_id') is not None:
+                workout = db.session.get(Workout, values['workout_id'])
+                if workout is None:
+                    return {'error': f"Workout {values['workout_id']} not found"}, 400
+                # Templates, or the user's own workouts
+                if workout.user_id is not None and workout.user_id != session['user_id']:
+                    return {'error': 'Not authorized'}, 403
+            values['user_id'] = session['user_id']  # Force current user
+            workout_session = WorkoutSession(**values)
+            db.session.add(workout_session)
+            db.session.commit()
+            return serialize(workout_session), 201
+        except Exception as e:
+            db.session.rollback()
+            return {'error': str(e)}, 400
+
+class WorkoutSessionResource(Resource):
+    def get(self, id):
+        workout_session = WorkoutSession.query.options(selectinload(WorkoutSession.set_logs)).get_or_404(id)
+        error = session_access_error(workout_session)
+        if error:
+            return error
+        data = serialize(workout_session)
+        data['set_logs'] = serialize_many(workout_session.set_logs)
+        return data
+    
+    def patch(self, id):
+        workout_session = WorkoutSession.query.get_or_404(id)
+        error = session_access_error(workout_session)
+        if error:
+            return error
+        try:
+            values = session_values(request.get_json(silent=True) or {}, SESSION_FIELDS - {'workout_id'})
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        for key, value in values.items():
+            setattr(workout_session, key, value)
+        db.session.commit()
+        return serialize(workout_session)
+    
+    def delete(self, id):
+        workout_session = WorkoutSession.query.get_or_404(id)
+        error = session_access_error(workout_session)
+        if error:
+            return error
+        delete_set_logs(session_id=id)
+        db.session.delete(workout_session)
+        db.session.commit()
+        return '', 204
+
+class SetLogBatchResource(Resource):
+    def post(self, id):
+        workout_session = WorkoutSession.query.get_or_404(id)
+        error = session_access_error(workout_session)
+        if error:
+            return error
+        
+        rows, errors = validate_set_logs(request.get_json(silent=True))
+        if errors:
+            return {'error': 'Invalid sets', 'details': errors}, 400
+        
+        try:
+            inserted, records = log_sets(workout_session, rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return {'error': str(e)}, 400
+        
+        return {
+            'inserted': inserted,
+            'duplicates': len(rows) - inserted,
+            'personal_records': [
+                {'exercise_id': exercise_id, 'personal_record': record} for _, exercise_id, record in records
+            ],
+        }, 201 if inserted else 200
+
 # Instructor Resources
 class InstructorListResource(Resource):
+    @conditional('instructors')
     def get(self):
         try:
-            instructors = Instructor.query.all()
-            return [instructor.to_dict() for instructor in instructors]
+            return list_response(Instructor.query, Instructor,
+                                 filters=('specialty',),
+                                 sorts=('id', 'created_at', 'name'))
+        except PaginationError as e:
+            return {'error': str(e)}, 400
         except Exception as e:
             return {'error': str(e)}, 500
     
@@ -209,30 +644,85 @@ class InstructorListResource(Resource):
             data = request.get_json()
             instructor = Instructor(**data)
             db.session.add(instructor)
+            bump_versions('instructors')
             db.session.commit()
-            return instructor.to_dict(), 201
+            return serialize(instructor), 201
         except Exception as e:
             return {'error': str(e)}, 400
 
 class InstructorResource(Resource):
+    @conditional('instructors')
     def get(self, id):
-        instructor = Instructor.query.get_or_404(id)
-        return instructor.to_dict()
+        try:
+            fields = parse_fields(Instructor, request.args)
+        except PaginationError as e:
+            return {'error': str(e)}, 400
+        return project(catalog_cache.get_or_load('instructor', id, lambda: serialize(
+            Instructor.query.get_or_404(id)
+        ), versions=('instructors',)), fields)
     
     def patch(self, id):
         instructor = Instructor.query.get_or_404(id)
         data = request.get_json()
         for key, value in data.items():
             setattr(instructor, key, value)
+        bump_versions('instructors')
         db.session.commit()
-        return instructor.to_dict()
+        return serialize(instructor)
     
     def delete(self, id):
         instructor = Instructor.query.get_or_404(id)
         db.session.delete(instructor)
+        bump_versions('instructors')
         db.session.commit()
         return '', 204
 
+# Admin data transfer
+def admin_error():
+    if 'user_id' not in session:
+        return {'error': 'Not logged in'}, 401
+    user = User.query.get(session['user_id'])
+    if not user or not user.is_admin:
+        return {'error': 'Not authorized'}, 403
+    return None
+
+class ExportResource(Resource):
+    def get(self):
+        error = admin_error()
+        if error:
+            return error
+        tables = [name for name in request.args.get('tables', '').split(',') if name]
+        unknown = [name for name in tables if name not in TRANSFER_TABLES]
+        if unknown:
+            return {'error': f"Unknown tables: {', '.join(unknown)}"}, 400
+        response = Response(stream_with_context(export_lines(tables)), mimetype='application/x-ndjson')
+        response.headers['Content-Disposition'] = 'attachment; filename=fitforge-export.ndjson'
+        return response
+
+class ImportResource(Resource):
+    def post(self):
+        error = admin_error()
+        if error:
+            return error
+        try:
+            chunk_size = int(request.args.get('chunk_size', IMPORT_CHUNK_SIZE))
+        except ValueError:
+            return {'error': 'chunk_size must be an integer'}, 400
+        # Every chunk is committed; on failure committed_bytes tells the
+        # client where to resume (send the rest of the file from there)
+        committed = {'bytes': 0}
+        importer = Importer(chunk_size, on_commit=lambda offset, counts, skipped: committed.update(bytes=offset))
+        try:
+            importer.run(request.stream)
+        except TransferError as e:
+            return {'error': str(e), 'committed_bytes': committed['bytes']}, 400
+        except Exception as e:
+            return {'error': str(e), 'committed_bytes': committed['bytes']}, 500
+        finally:
+            if committed['bytes']:
+                finish_import()
+        return {'rows': importer.counts, 'skipped': importer.skipped, 'committed_bytes': committed['bytes']}
+
 # Authentication Routes
 def register():
     try:
@@ -253,7 +743,7 @@ def register():
         db.session.add(user)
         db.session.commit()
         session['user_id'] = user.id
-        return user.to_dict(), 201
+        return serialize(user), 201
     except Exception as e:
         db.session.rollback()
         return {'error': str(e)}, 400
@@ -267,7 +757,7 @@ def login():
         user = User.query.filter_by(email=data['email']).first()
         if user and user.check_password(data['password']):
             session['user_id'] = user.id
-            return user.to_dict()
+            return serialize(user)
         return {'error': 'Invalid email or password'}, 401
     except Exception as e:
         return {'error': str(e)}, 400
@@ -280,7 +770,7 @@ def current_user():
     if 'user_id' in session:
         user = User.query.get(session['user_id'])
         if user:
-            return user.to_dict()
+            return serialize(user)
     return {'error': 'Not logged in'}, 401
 
 def my_exercises():
@@ -288,8 +778,10 @@ def my_exercises():
         return {'error': 'Not logged in'}, 401
     
     try:
-        user_exercises = UserExercise.query.filter_by(user_id=session['user_id']).all()
-        return [ue.to_dict() for ue in user_exercises]
+        query = UserExercise.query.filter_by(user_id=session['user_id'])
+        return list_response(query, UserExercise, filters=('exercise_id',))
+    except PaginationError as e:
+        return {'error': str(e)}, 400
     except Exception as e:
         return {'error': str(e)}, 500
 
@@ -298,10 +790,43 @@ def my_workouts():
         return {'error': 'Not logged in'}, 401
     
     try:
-        workouts = Workout.query.filter(
+        query = Workout.query.filter(
             Workout.user_id == session['user_id'],
             Workout.user_id.isnot(None)
-        ).all()
-        return [workout.to_dict() for workout in workouts]
+        )
+        return list_response(query, Workout,
+                             filters=('instructor_id', 'duration'),
+                             sorts=('id', 'created_at', 'name', 'duration'))
+    except PaginationError as e:
+        return {'error': str(e)}, 400
     except Exception as e:
-        return {'error': str(e)}, 500
\ No newline at end of file
+        return {'error': str(e)}, 500
+
+def sync():
+    if 'user_id' not in session:
+        return {'error': 'Not logged in'}, 401
+    # Without since: the cursor to start from, taken before the client
+    # downloads the full lists
+    if 'since' not in request.args:
+        return {'changes': {}, 'deleted': {}, 'next_cursor': str(latest_cursor()), 'has_more': False}
+    try:
+        since = parse_cursor(request.args['since'])
+    except SyncError as e:
+        return {'error': str(e)}, 400
+    try:
+        return changes_since(session['user_id'], since)
+    except SyncError as e:
+        # The database was recreated or the entries after since were pruned;
+        # the client has to start over
+        return {'error': str(e)}, 410
+
+def progress_analytics():
+    if 'user_id' not in session:
+        return {'error': 'Not logged in'}, 401
+    try:
+        options = parse_options(request.args)
+        filters = {key: options.pop(key) for key in ('since', 'until', 'exercise_id', 'muscle_group')}
+        rows = db.session.execute(training_query(session['user_id'], **filters)).all()
+        return progress(rows, **options)
+    except AnalyticsError as e:
+        return {'error': str(e)}, 400
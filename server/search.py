@@ -0,0 +1,119 @@
+import re
+
+from sqlalchemy import Integer, column, event, or_, text
+from sqlalchemy.orm import Session
+from models import db, Exercise, Workout
+
+# SQLite FTS5 indexes over the searchable text of exercises and workouts.
+# rowid mirrors the source row id. The ORM write paths keep them in sync via
+# the after_flush hook below; bulk Core writes must call index_rows().
+SEARCH_INDEXES = {
+    Exercise: ('exercises_fts', ('name', 'instructions'), (10.0, 1.0)),
+    Workout: ('workouts_fts', ('name', 'description'), (10.0, 1.0)),
+}
+
+_ready = {}
+
+
+def _fts_ready(connection):
+    if connection.dialect.name != 'sqlite':
+        return False
+    key = str(connection.engine.url)
+    if key not in _ready:
+        names = set(connection.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%\\_fts' ESCAPE '\\'"
+        )).scalars())
+        _ready[key] = all(table in names for table, _, _ in SEARCH_INDEXES.values())
+    return _ready[key]
+
+
+def _fts_ready_on(engine):
+    if engine.dialect.name != 'sqlite':
+        return False
+    ready = _ready.get(str(engine.url))
+    if ready is None:
+        with engine.connect() as connection:
+            ready = _fts_ready(connection)
+    return ready
+
+
+def create_search_index(connection, rebuild=True):
+    """Create the FTS5 tables if needed and (re)populate them from the source tables."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for model, (table, columns, _) in SEARCH_INDEXES.items():
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({', '.join(columns)}, tokenize='porter unicode61')"
+        ))
+        if rebuild:
+            connection.execute(text(f'DELETE FROM {table}'))
+            connection.execute(text(
+                f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+                f"SELECT id, {', '.join(columns)} FROM {model.__tablename__}"
+            ))
+    _ready[str(connection.engine.url)] = True
+
+
+def index_rows(connection, model, ids):
+    """Re-index the given source rows; rows that no longer exist are dropped."""
+    if not ids or not _fts_ready(connection):
+        return
+    table, columns, _ = SEARCH_INDEXES[model]
+    params = [{'id': id} for id in ids]
+    connection.execute(text(f'DELETE FROM {table} WHERE rowid = :id'), params)
+    connection.execute(text(
+        f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+        f"SELECT id, {', '.join(columns)} FROM {model.__tablename__} WHERE id = :id"
+    ), params)
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    changed = {}
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if type(obj) in SEARCH_INDEXES:
+            changed.setdefault(type(obj), set()).add(obj.id)
+    if not changed:
+        return
+    connection = session.connection()
+    for model, ids in changed.items():
+        index_rows(connection, model, sorted(ids))
+
+
+def match_expression(q):
+    # Quote every term so user input cannot inject FTS5 syntax; the last
+    # term is a prefix match for search-as-you-type
+    terms = re.findall(r'\w+', q or '')
+    if not terms:
+        return None
+    return ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+
+
+def search_ids(model, q, limit, templates_only=False):
+    """Return ids of model matching q, best match first.
+
+    The query goes through the session's read routing, so the ids come from
+    the same database (primary or replica) as the rows the caller loads.
+    """
+    match = match_expression(q)
+    if match is None:
+        return []
+    table, columns, weights = SEARCH_INDEXES[model]
+    where = 'AND src.user_id IS NULL' if templates_only else ''
+    statement = text(
+        f"SELECT {table}.rowid FROM {table} JOIN {model.__tablename__} src ON src.id = {table}.rowid "
+        f"WHERE {table} MATCH :match {where} "
+        f"ORDER BY bm25({table}, {', '.join(str(w) for w in weights)}) LIMIT :limit"
+    ).columns(column('rowid', Integer))  # a SELECT, which RoutingSession can route
+    if _fts_ready_on(db.session.get_bind(clause=statement)):
+        return list(db.session.execute(statement, {'match': match, 'limit': limit}).scalars())
+
+    # Databases without FTS5 fall back to a substring scan
+    terms = re.findall(r'\w+', q)
+    query = db.session.query(model.id)
+    for term in terms:
+        query = query.filter(or_(*(getattr(model, column).ilike(f'%{term}%') for column in columns)))
+    if templates_only:
+        query = query.filter(model.user_id.is_(None))
+    return [row[0] for row in query.order_by(model.id).limit(limit)]
+
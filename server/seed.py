@@ -1,5 +1,16 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+
+from sqlalchemy import insert, text
+from werkzeug.security import generate_password_hash
+
 from app import app
 from models import db, User, Exercise, Workout, WorkoutExercise, UserExercise, Instructor
+from conditional import bump_versions
+from search import create_search_index
 
 def seed_data():
     with app.app_context():
@@ -124,8 +135,271 @@ def seed_data():
         # All users (including Admin) start with empty profiles
         # Users will add content using "Add to My Profile" buttons
         
+        bump_versions('exercises', 'instructors', 'workouts')
+        create_search_index(db.session.connection())
         db.session.commit()
         print("Database seeded successfully!")
 
+# Load-test data generator
+
+SPECIALTIES = ['Strength Training', 'Cardio & Endurance', 'Functional Fitness', 'Flexibility & Recovery']
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn',
+               'Wanjiru', 'Kamau', 'Achieng', 'Otieno', 'Amina', 'Lewis', 'Max', 'Charles', 'Lando', 'Zelda']
+LAST_NAMES = ['Kibathi', 'Waithaka', 'Gallagher', 'Hamilton', 'Norris', 'Leclerc', 'Mwangi', 'Odhiambo',
+              'Smith', 'Garcia', 'Chen', 'Patel', 'Okafor', 'Silva', 'Kowalski', 'Nguyen']
+# (category, muscle groups, weight range in kg; 0 for bodyweight work)
+CATEGORIES = [
+    ('Weightlifting', ['Chest', 'Back', 'Legs', 'Shoulders', 'Arms'], (20, 180)),
+    ('Bodyweight', ['Chest', 'Core', 'Legs', 'Full Body'], (0, 0)),
+    ('Cardio', ['Legs', 'Full Body'], (0, 0)),
+    ('Yoga', ['Full Body', 'Core', 'Back'], (0, 0)),
+]
+MOVEMENTS = ['Squat', 'Press', 'Row', 'Deadlift', 'Lunge', 'Plank', 'Push-up', 'Pull-up', 'Curl', 'Sprint',
+             'Flow', 'Stretch', 'Carry', 'Swing', 'Jump']
+MODIFIERS = ['Power', 'Tempo', 'Paused', 'Explosive', 'Single-arm', 'Single-leg', 'Banded', 'Isometric',
+             'Incline', 'Deficit', 'Weighted', 'Slow']
+# Most users are beginners and most exercises are beginner or intermediate
+FITNESS_LEVELS = (['Beginner', 'Intermediate', 'Advanced'], [50, 35, 15])
+DIFFICULTIES = (['Beginner', 'Intermediate', 'Advanced'], [40, 40, 20])
+REPS = [1, 3, 5, 6, 8, 10, 12, 15, 20, 30, 60]
+REST_TIMES = [30, 45, 60, 90, 120, 180]
+HISTORY_DAYS = 730
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert(connection, model, rows, chunk_size):
+    started = time.perf_counter()
+    count = 0
+    statement = insert(model.__table__)
+    for chunk in _chunks(rows, chunk_size):
+        connection.execute(statement, chunk)
+        count += len(chunk)
+    print(f'  {model.__tablename__}: {count} rows in {time.perf_counter() - started:.1f}s')
+    return count
+
+
+class Generator:
+    """Builds rows with explicit ids so children can reference parents
+    without reading anything back from the database."""
+
+    def __init__(self, instructors, users, exercises, templates, workouts_per_user,
+                 exercises_per_workout, exercises_per_user, seed):
+        self.rng = random.Random(seed)
+        self.instructors = instructors
+        self.users = users
+        self.exercises = exercises
+        self.templates = templates
+        self.workouts_per_user = workouts_per_user
+        self.exercises_per_workout = exercises_per_workout
+        self.exercises_per_user = exercises_per_user
+        self.now = datetime.utcnow().replace(microsecond=0)
+        # A few exercises are in most programs and the rest form a long tail
+        self.popularity = list(accumulate(rank ** -0.7 for rank in range(1, exercises + 1)))
+        self.weight_ranges = {}
+        self.next_workout_id = 1
+
+    def created_at(self, days=HISTORY_DAYS):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def name(self):
+        return f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+
+    def pick_exercises(self, count):
+        picked = set(self.rng.choices(range(1, self.exercises + 1), cum_weights=self.popularity, k=count))
+        return sorted(picked)
+
+    def weight(self, exercise_id):
+        low, high = self.weight_ranges[exercise_id]
+        return float(self.rng.randrange(low, high + 1, 5)) if high else None
+
+    def instructor_rows(self):
+        for id in range(1, self.instructors + 1):
+            specialty = SPECIALTIES[(id - 1) % len(SPECIALTIES)]
+            yield {'id': id, 'name': self.name(), 'specialty': specialty,
+                   'bio': f'{specialty} coach', 'created_at': self.created_at()}
+
+    def user_rows(self, password_hash):
+        for id in range(1, self.users + 1):
+            yield {
+                'id': id,
+                'name': 'Admin User' if id == 1 else self.name(),
+                'email': 'admin@fitforge.com' if id == 1 else f'user{id}@fitforge.com',
+                'password_hash': password_hash,
+                'fitness_level': self.rng.choices(*FITNESS_LEVELS)[0],
+                'is_admin': id == 1,
+                'created_at': self.created_at(),
+            }
+
+    def exercise_rows(self):
+        for id in range(1, self.exercises + 1):
+            category, muscle_groups, weight_range = self.rng.choice(CATEGORIES)
+            self.weight_ranges[id] = weight_range
+            yield {
+                'id': id,
+                'name': f'{self.rng.choice(MODIFIERS)} {self.rng.choice(MOVEMENTS)} {id}',
+                'category': category,
+                'muscle_group': self.rng.choice(muscle_groups),
+                'difficulty': self.rng.choices(*DIFFICULTIES)[0],
+                'instructions': f'{category} movement. Keep a controlled tempo and full range of motion.',
+                'instructor_id': self.rng.randint(1, self.instructors),
+                'created_at': self.created_at(),
+            }
+
+    def workout_batches(self, batch_size):
+        """Yield (workouts, workout_exercises) row lists of about batch_size workouts.
+
+        Workouts per user follow an exponential distribution around the
+        requested mean: many users have a couple, a few have dozens.
+        """
+        owners = [None] * self.templates
+        for user_id in range(1, self.users + 1):
+            if self.workouts_per_user:
+                count = int(self.rng.expovariate(1.0 / self.workouts_per_user))
+                owners.extend([user_id] * min(count, int(self.workouts_per_user * 10)))
+            if len(owners) >= batch_size:
+                yield self._workouts(owners)
+                owners = []
+        if owners:
+            yield self._workouts(owners)
+
+    def _workouts(self, owners):
+        workouts, workout_exercises = [], []
+        for user_id in owners:
+            id = self.next_workout_id
+            self.next_workout_id += 1
+            workouts.append({
+                'id': id,
+                'name': f'{self.rng.choice(MODIFIERS)} {self.rng.choice(MOVEMENTS)} Day',
+                'description': 'Instructor program' if user_id is None else 'Personal workout',
+                'duration': self.rng.choice([20, 30, 45, 60, 75, 90]),
+                'instructor_id': self.rng.randint(1, self.instructors),
+                'user_id': user_id,
+                'created_at': self.created_at(),
+            })
+            count = max(1, int(self.rng.gauss(self.exercises_per_workout, 2)))
+            for exercise_id in self.pick_exercises(count):
+                workout_exercises.append({
+                    'workout_id': id,
+                    'exercise_id': exercise_id,
+                    'sets': self.rng.randint(2, 5),
+                    'reps': self.rng.choice(REPS),
+                    'weight': self.weight(exercise_id) or 0.0,
+                    'rest_time': self.rng.choice(REST_TIMES),
+                })
+        return workouts, workout_exercises
+
+    def user_exercise_rows(self):
+        for user_id in range(1, self.users + 1):
+            count = int(self.rng.expovariate(1.0 / self.exercises_per_user)) if self.exercises_per_user else 0
+            for exercise_id in self.pick_exercises(count):
+                yield {
+                    'user_id': user_id,
+                    'exercise_id': exercise_id,
+                    'personal_record': self.weight(exercise_id),
+                    'notes': None,
+                    'created_at': self.created_at(),
+                }
+
+
+def generate_data(instructors=20, users=1000, exercises=500, templates=100, workouts_per_user=5,
+                  exercises_per_workout=6, exercises_per_user=10, chunk_size=10000, seed=0):
+    """Replace the database with generated data for load testing.
+
+    Rows go in through executemany Core inserts of chunk_size rows, one
+    transaction per table. Secondary indexes are dropped during the load and
+    rebuilt afterwards, and every user shares one precomputed password hash
+    (password123); user 1 is admin@fitforge.com.
+    """
+    generator = Generator(instructors, users, exercises, templates, workouts_per_user,
+                          exercises_per_workout, exercises_per_user, seed)
+    started = time.perf_counter()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        deferred = [index for table in db.metadata.sorted_tables for index in table.indexes if not index.unique]
+        password_hash = generate_password_hash('password123')
+
+        with db.engine.connect() as connection:
+            if connection.dialect.name == 'sqlite':
+                # Nothing to lose if the load is interrupted; it starts from scratch anyway
+                connection.execute(text('PRAGMA synchronous = OFF'))
+                connection.commit()
+            for index in deferred:
+                index.drop(connection)
+            connection.commit()
+
+            print('Generating data...')
+            _insert(connection, Instructor, generator.instructor_rows(), chunk_size)
+            connection.commit()
+            _insert(connection, User, generator.user_rows(password_hash), chunk_size)
+            connection.commit()
+            _insert(connection, Exercise, generator.exercise_rows(), chunk_size)
+            connection.commit()
+            batch_started = time.perf_counter()
+            counts = [0, 0]
+            for workouts, workout_exercises in generator.workout_batches(chunk_size):
+                # Parents first so every batch satisfies the foreign keys
+                for chunk in _chunks(workouts, chunk_size):
+                    connection.execute(insert(Workout.__table__), chunk)
+                for chunk in _chunks(workout_exercises, chunk_size):
+                    connection.execute(insert(WorkoutExercise.__table__), chunk)
+                counts[0] += len(workouts)
+                counts[1] += len(workout_exercises)
+            connection.commit()
+            print(f'  workouts: {counts[0]} rows, workout_exercises: {counts[1]} rows '
+                  f'in {time.perf_counter() - batch_started:.1f}s')
+            _insert(connection, UserExercise, generator.user_exercise_rows(), chunk_size)
+            connection.commit()
+
+            index_started = time.perf_counter()
+            for index in deferred:
+                index.create(connection)
+            connection.commit()
+            print(f'  indexes: {len(deferred)} in {time.perf_counter() - index_started:.1f}s')
+
+        bump_versions('exercises', 'instructors', 'workouts')
+        create_search_index(db.session.connection())
+        db.session.commit()
+    print(f'Database generated in {time.perf_counter() - started:.1f}s')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Seed the demo data, or generate a large dataset when any size option is given.'
+    )
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--exercises', type=int)
+    parser.add_argument('--instructors', type=int)
+    parser.add_argument('--templates', type=int, help='instructor workout templates')
+    parser.add_argument('--workouts-per-user', type=float, help='mean personal workouts per user')
+    parser.add_argument('--exercises-per-workout', type=float, help='mean exercises per workout')
+    parser.add_argument('--exercises-per-user', type=float, help='mean exercises in a user profile')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='rows per INSERT executemany')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
-    seed_data()
\ No newline at end of file
+    args = parse_args()
+    sizes = {
+        'users': args.users,
+        'exercises': args.exercises,
+        'instructors': args.instructors,
+        'templates': args.templates,
+        'workouts_per_user': args.workouts_per_user,
+        'exercises_per_workout': args.exercises_per_workout,
+        'exercises_per_user': args.exercises_per_user,
+    }
+    sizes = {name: value for name, value in sizes.items() if value is not None}
+    if sizes:
+        generate_data(chunk_size=args.chunk_size, seed=args.seed, **sizes)
+    else:
+        seed_data()
@@ -0,0 +1,44 @@
+import logging
+
+from flask import Response, stream_with_context
+
+from models import db
+from serializers import serialize
+from representations import dumps
+
+logger = logging.getLogger('fitforge.streaming')
+
+STREAM_BATCH_SIZE = 1000
+
+
+def wants_stream(args):
+    return args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def _json_array(query, batch_size, serialize_row):
+    yield b'['
+    first = True
+    try:
+        result = db.session.scalars(query.statement, execution_options={'yield_per': batch_size})
+        for rows in result.partitions():
+            chunk = b','.join(dumps(serialize_row(row)) for row in rows)
+            yield chunk if first else b',' + chunk
+            first = False
+    except Exception:
+        # The status line is already sent; an unterminated array tells the
+        # client the export is incomplete
+        logger.exception('Streaming %s failed', query)
+        return
+    yield b']'
+
+
+def stream_response(query, batch_size=STREAM_BATCH_SIZE, serialize_row=serialize):
+    """Serialize query into a JSON array written batch by batch.
+
+    Rows are fetched yield_per batch_size from a server-side cursor, so a full
+    export of a large table holds one batch in memory at a time (the
+    session's identity map only keeps weak references to unmodified rows).
+    Loader options on query (e.g. serialize_options) apply to each batch.
+    """
+    return Response(stream_with_context(_json_array(query, batch_size, serialize_row)),
+                    mimetype='application/json')
@@ -0,0 +1,175 @@
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm.util import identity_key
+
+from models import db, ChangeLog, Instructor, Exercise, Workout, WorkoutExercise, UserExercise
+from replica import RoutingSession
+from fieldsets import column_fields, query_options
+from serializers import serialize_many
+
+SYNC_MODELS = (Instructor, Exercise, Workout, WorkoutExercise, UserExercise)
+SYNC_TABLES = {model.__tablename__: model for model in SYNC_MODELS}
+SYNC_LIMIT = 1000  # change log entries per /sync response
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+change_log = ChangeLog.__table__
+workouts_table = Workout.__table__
+
+
+class SyncError(ValueError):
+    pass
+
+
+def _workout_owners(connection, workout_ids, known):
+    """{workout_id: user_id}, from known first and then one IN query."""
+    owners = {id: known[id] for id in workout_ids if id in known}
+    missing = set(workout_ids) - set(owners)
+    if missing:
+        owners.update(connection.execute(
+            select(workouts_table.c.id, workouts_table.c.user_id).where(workouts_table.c.id.in_(missing))
+        ).all())
+    return owners
+
+
+def _entries_for(connection, table_name, rows, op, owners):
+    if table_name == 'workout_exercises':
+        owners = _workout_owners(connection, {row['workout_id'] for row in rows}, owners or {})
+        scopes = [owners.get(row['workout_id']) for row in rows]
+    else:
+        scopes = [row.get('user_id') for row in rows]
+    return [
+        {'table_name': table_name, 'row_id': row['id'], 'user_id': user_id, 'op': op}
+        for row, user_id in zip(rows, scopes)
+    ]
+
+
+def record_changes(connection, table_name, rows, op, owners=None):
+    """Append change log entries for rows (dicts with id, and user_id or
+    workout_id to scope personal rows) written with Core statements.
+
+    owners maps workout_id -> user_id for workouts the caller already has;
+    other workout exercises are scoped with one query.
+    """
+    rows = list(rows)
+    if rows:
+        connection.execute(insert(change_log), _entries_for(connection, table_name, rows, op, owners))
+
+
+def _row(obj):
+    return {'id': obj.id, 'user_id': getattr(obj, 'user_id', None), 'workout_id': getattr(obj, 'workout_id', None)}
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _log_flush(session, flush_context):
+    # Every ORM write to a synced table is logged in the same transaction
+    changes = {}
+    for op, objs in ((UPSERT, session.new), (UPSERT, session.dirty), (DELETE, session.deleted)):
+        for obj in objs:
+            table_name = getattr(obj, '__tablename__', None)
+            if table_name not in SYNC_TABLES:
+                continue
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            changes.setdefault((table_name, op), []).append(_row(obj))
+    if not changes:
+        return
+
+    # Workouts written in this flush (deleted ones are gone from the database)
+    known = {}
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Workout):
+            known[obj.id] = obj.user_id
+    for row in changes.get(('workout_exercises', UPSERT), []) + changes.get(('workout_exercises', DELETE), []):
+        workout = session.identity_map.get(identity_key(Workout, row['workout_id']))
+        if workout is not None:
+            known.setdefault(workout.id, workout.user_id)
+
+    connection = session.connection()
+    entries = []
+    for (table_name, op), rows in changes.items():
+        entries.extend(_entries_for(connection, table_name, rows, op, known))
+    connection.execute(insert(change_log), entries)
+
+
+def latest_cursor():
+    return db.session.execute(select(func.coalesce(func.max(change_log.c.id), 0))).scalar()
+
+
+def prune_changes(before):
+    """Delete change log entries written before the datetime before.
+
+    Entries go in id order, up to the newest one older than before, so what
+    remains is always every entry after some cursor: /sync can tell which
+    cursors it no longer covers. The newest entry is always kept, so
+    latest_cursor() does not go back. Returns the number of entries deleted.
+    """
+    cutoff = select(func.max(change_log.c.id)).where(change_log.c.changed_at < before).scalar_subquery()
+    newest = select(func.max(change_log.c.id)).scalar_subquery()
+    result = db.session.execute(delete(change_log).where(change_log.c.id <= cutoff, change_log.c.id < newest))
+    db.session.commit()
+    return result.rowcount
+
+
+def parse_cursor(raw):
+    try:
+        cursor = int(raw)
+    except (TypeError, ValueError):
+        raise SyncError('since must be a cursor returned by /sync')
+    if cursor < 0:
+        raise SyncError('since must be a cursor returned by /sync')
+    return cursor
+
+
+def _entries(user_id, since, limit):
+    # Shared and personal entries are two range scans of
+    # ix_change_log_user_id_id, merged here in id order
+    columns = (change_log.c.id, change_log.c.table_name, change_log.c.row_id, change_log.c.op)
+    scopes = (change_log.c.user_id.is_(None), change_log.c.user_id == user_id)
+    entries = []
+    for scope in scopes:
+        entries.extend(db.session.execute(
+            select(*columns).where(scope, change_log.c.id > since).order_by(change_log.c.id).limit(limit + 1)
+        ).all())
+    entries.sort()
+    return entries[:limit], len(entries) > limit
+
+
+def changes_since(user_id, since, limit=SYNC_LIMIT):
+    """Rows of the synced tables created, updated or deleted after since,
+    for the shared catalog and user_id's own rows.
+
+    Each row appears once with its current columns, or as a deleted id when
+    its latest entry is a delete (or the row is gone). next_cursor is the
+    last entry included; has_more means another request is needed.
+    """
+    oldest, newest = db.session.execute(select(func.min(change_log.c.id), func.max(change_log.c.id))).one()
+    if since > (newest or 0):
+        raise SyncError('Cursor is ahead of the change log; sync from scratch')
+    if oldest is not None and since < oldest - 1:
+        raise SyncError('Cursor is older than the change log; sync from scratch')
+    entries, has_more = _entries(user_id, since, limit)
+
+    latest = {}
+    for _, table_name, row_id, op in entries:
+        latest[table_name, row_id] = op
+    upserts, deleted = {}, {}
+    for (table_name, row_id), op in latest.items():
+        (upserts if op == UPSERT else deleted).setdefault(table_name, []).append(row_id)
+
+    changes = {}
+    for table_name, ids in upserts.items():
+        model = SYNC_TABLES[table_name]
+        fields = column_fields(model)
+        objs = model.query.options(*query_options(model, fields)).filter(model.id.in_(ids)).all()
+        changes[table_name] = serialize_many(objs, fields=fields)
+        gone = set(ids) - {obj.id for obj in objs}
+        if gone:
+            deleted.setdefault(table_name, []).extend(sorted(gone))
+
+    return {
+        'changes': changes,
+        'deleted': deleted,
+        'next_cursor': str(entries[-1][0] if entries else since),
+        'has_more': has_more,
+    }
@@ -0,0 +1,156 @@
+import os
+import runpy
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+_db_dir = tempfile.mkdtemp(prefix='fitforge-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'test.db')
+os.environ['CATALOG_CACHE_BACKEND'] = 'none'  # budgets are for uncached requests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+from sqlalchemy import event, insert  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import app as flask_app  # noqa: E402
+from models import db, Instructor, User, Exercise, Workout, WorkoutExercise, UserExercise, WorkoutSession, SetLog  # noqa: E402
+from conditional import bump_versions  # noqa: E402
+from search import create_search_index  # noqa: E402
+
+PASSWORD = 'password123'
+
+# Scaled so that an N+1 regression shows up as hundreds of statements
+INSTRUCTORS = 20
+USERS = 200
+EXERCISES = 1000
+TEMPLATE_WORKOUTS = 100
+WORKOUTS_PER_USER = 5
+EXERCISES_PER_WORKOUT = 6
+EXERCISES_PER_USER = 20
+SESSIONS_PER_USER = 2
+SETS_PER_SESSION = 10
+
+ADMIN_ID = 1
+USER_ID = 2
+
+
+def user_email(id):
+    return f'user{id}@fitforge.test'
+
+
+def build_dataset():
+    now = datetime(2025, 1, 1)
+    password_hash = generate_password_hash(PASSWORD)
+    categories = ['Bodyweight', 'Cardio', 'Weightlifting', 'Yoga']
+    muscles = ['Chest', 'Legs', 'Back', 'Core', 'Full Body']
+    levels = ['Beginner', 'Intermediate', 'Advanced']
+
+    instructors = [
+        {'id': i, 'name': f'Instructor {i}', 'specialty': categories[i % 4], 'bio': 'Coach', 'created_at': now}
+        for i in range(1, INSTRUCTORS + 2)  # the last one owns nothing and can be deleted
+    ]
+    users = [
+        {'id': i, 'name': f'User {i}', 'email': user_email(i), 'password_hash': password_hash,
+         'fitness_level': levels[i % 3], 'is_admin': i == ADMIN_ID, 'created_at': now}
+        for i in range(1, USERS + 1)
+    ]
+    exercises = [
+        {'id': i, 'name': f'Exercise {i}', 'category': categories[i % 4], 'muscle_group': muscles[i % 5],
+         'difficulty': levels[i % 3], 'instructions': f'Do exercise {i} slowly', 'instructor_id': i % INSTRUCTORS + 1,
+         'created_at': now + timedelta(minutes=i)}
+        for i in range(1, EXERCISES + 1)
+    ]
+    workouts = []
+    for i in range(1, TEMPLATE_WORKOUTS + 1):
+        workouts.append({'id': i, 'name': f'Template {i}', 'description': 'Instructor program', 'duration': 30 + i % 60,
+                         'instructor_id': i % INSTRUCTORS + 1, 'user_id': None, 'created_at': now})
+    for user_id in range(1, USERS + 1):
+        for n in range(WORKOUTS_PER_USER):
+            id = len(workouts) + 1
+            workouts.append({'id': id, 'name': f'Personal {id}', 'description': 'Mine', 'duration': 45,
+                             'instructor_id': id % INSTRUCTORS + 1, 'user_id': user_id, 'created_at': now})
+    workout_exercises = [
+        {'workout_id': workout['id'], 'exercise_id': (workout['id'] * 7 + n) % EXERCISES + 1,
+         'sets': 3, 'reps': 10, 'weight': 20.0, 'rest_time': 60}
+        for workout in workouts for n in range(EXERCISES_PER_WORKOUT)
+    ]
+    user_exercises = [
+        {'user_id': user_id, 'exercise_id': (user_id * 13 + n) % EXERCISES + 1,
+         'personal_record': 50.0, 'notes': 'note', 'created_at': now}
+        for user_id in range(1, USERS + 1) for n in range(EXERCISES_PER_USER)
+    ]
+
+    # User n owns sessions SESSIONS_PER_USER * (n - 1) + 1 and up
+    workout_sessions = [
+        {'user_id': user_id, 'workout_id': None, 'started_at': now + timedelta(days=n), 'created_at': now}
+        for user_id in range(1, USERS + 1) for n in range(SESSIONS_PER_USER)
+    ]
+    set_logs = [
+        {'session_id': session_id, 'user_id': (session_id - 1) // SESSIONS_PER_USER + 1,
+         'exercise_id': (session_id + n) % EXERCISES + 1, 'reps': 8, 'weight': 40.0 + n,
+         'performed_at': now, 'client_id': f'{session_id}-{n}'}
+        for session_id in range(1, len(workout_sessions) + 1) for n in range(SETS_PER_SESSION)
+    ]
+
+    for model, rows in ((Instructor, instructors), (User, users), (Exercise, exercises), (Workout, workouts),
+                        (WorkoutExercise, workout_exercises), (UserExercise, user_exercises),
+                        (WorkoutSession, workout_sessions), (SetLog, set_logs)):
+        db.session.execute(insert(model.__table__), rows)
+    bump_versions('exercises', 'instructors', 'workouts')
+    create_search_index(db.session.connection())
+    db.session.commit()
+
+
+@pytest.fixture(scope='session')
+def app():
+    with flask_app.app_context():
+        db.create_all()
+        build_dataset()
+    yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def configured_app(**env):
+    """Another app from app.py, configured by env, over the test database."""
+    with mock.patch.dict(os.environ, env):
+        return runpy.run_path(_APP_PATH, run_name='configured_app')['app']
+
+
+def login(client, user_id=USER_ID):
+    response = client.post('/login', json={'email': user_email(user_id), 'password': PASSWORD})
+    assert response.status_code == 200
+    return client
+
+
+class StatementRecorder:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(Engine, 'before_cursor_execute', self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, 'before_cursor_execute', self)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def record_statements():
+    return StatementRecorder
@@ -0,0 +1,51 @@
+from conftest import USER_ID, login
+
+SESSION_ID = 3  # owned by USER_ID
+
+
+def test_progress_buckets_volume_and_e1rm(client, record_statements):
+    login(client, USER_ID)
+    # Two weeks of logged sets, with an idle week between them
+    sets = [
+        {'exercise_id': 100, 'reps': 5, 'weight': 100, 'performed_at': '2030-01-08T07:00:00Z'},
+        {'exercise_id': 100, 'reps': 5, 'weight': 100, 'performed_at': '2030-01-10T07:00:00Z'},
+        {'exercise_id': 100, 'reps': 1, 'weight': 120, 'performed_at': '2030-01-21T07:00:00Z'},
+        {'exercise_id': 100, 'reps': 20, 'weight': 50, 'performed_at': '2030-01-27T07:00:00Z'},
+    ]
+    assert client.post(f'/workout-sessions/{SESSION_ID}/sets', json=sets).status_code == 201
+    # A finished session without logged sets counts its workout's prescription
+    workout = client.post('/workouts', json={'name': 'Arms', 'duration': 20, 'instructor_id': 1}).get_json()
+    client.put(f"/workouts/{workout['id']}/exercises", json=[{'exercise_id': 7, 'sets': 3, 'reps': 10, 'weight': 20}])
+    client.post('/workout-sessions', json={'workout_id': workout['id'], 'started_at': '2030-02-05T18:00:00Z',
+                                           'ended_at': '2030-02-05T19:00:00Z'})
+
+    with record_statements() as recorder:
+        response = client.get('/analytics/progress?since=2030-01-01&window=2')
+    assert response.status_code == 200
+    assert recorder.count == 1
+    data = response.get_json()
+
+    assert data['buckets'] == ['2030-01-07', '2030-01-14', '2030-01-21', '2030-01-28', '2030-02-04']
+    series = {row['exercise_id']: row for row in data['series']}
+    assert series[7]['volume'] == [0, 0, 0, 0, 600]
+    assert series[7]['sets'] == [0, 0, 0, 0, 3]
+    squat = series[100]
+    assert squat['volume'] == [1000, 0, 1120, 0, 0]
+    assert squat['volume_avg'] == [1000, 500, 560, 560, 0]
+    # Epley: 100 x (1 + 5/30); the 20-rep set is too long to rate
+    assert squat['e1rm'] == [116.7, None, 120, None, None]
+    assert squat['e1rm_best'] == [116.7, 116.7, 120, 120, 120]
+    assert data['totals']['sets'] == [2, 0, 2, 0, 3]
+
+
+def test_progress_rejects_bad_options(client):
+    assert client.get('/analytics/progress').status_code == 401
+    login(client, USER_ID)
+    assert client.get('/analytics/progress?bucket=year').status_code == 400
+    assert client.get('/analytics/progress?window=0').status_code == 400
+
+    # Ten years of history is too many daily buckets, but fine by month
+    sets = [{'exercise_id': 100, 'reps': 5, 'weight': 80, 'performed_at': f'{year}-06-01'} for year in (2020, 2030)]
+    client.post(f'/workout-sessions/{SESSION_ID}/sets', json=sets)
+    assert client.get('/analytics/progress?bucket=day&since=2020-01-01').status_code == 400
+    assert client.get('/analytics/progress?bucket=month&since=2020-01-01').status_code == 200
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+from sqlalchemy import update
+
+from cache import MemoryBackend, SQLiteBackend, catalog_cache
+from conditional import bump_versions
+from models import db, Exercise
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cached(request, app, tmp_path):
+    """The catalog cache enabled (the other tests run with it off)."""
+    if request.param == 'memory':
+        backend = MemoryBackend(maxsize=100, ttl=300)
+    else:
+        backend = SQLiteBackend(str(tmp_path / 'cache.db'), maxsize=100, ttl=300)
+    catalog_cache.backend, catalog_cache.hits, catalog_cache.misses = backend, 0, 0
+    yield backend
+    catalog_cache.backend = None
+
+
+def test_second_read_is_served_from_the_cache(client, cached, record_statements):
+    first = client.get('/exercises/50')
+    with record_statements() as recorder:
+        second = client.get('/exercises/50')
+    assert second.get_json() == first.get_json()
+    assert (catalog_cache.misses, catalog_cache.hits) == (1, 1)
+    # Only the catalog version lookup shared by the ETag and the cache key
+    assert recorder.count == 1
+
+
+def test_patch_is_visible_on_the_next_read(client, cached):
+    bio = f'Patched via {type(cached).__name__}'
+    client.get('/instructors/5')
+    client.get('/exercises/4')
+    assert client.patch('/instructors/5', json={'bio': bio}).status_code == 200
+    assert client.get('/instructors/5').get_json()['bio'] == bio
+    # Exercises embed their instructor, so theirs are reloaded too
+    assert client.get('/exercises/4').get_json()['instructor']['bio'] == bio
+
+
+def test_write_by_another_worker_is_visible(app, client, cached):
+    instructions = f'Faster via {type(cached).__name__}'
+    client.get('/exercises/51')
+    # Another worker writes and bumps the shared version; nothing in this
+    # process is told about it
+    with app.app_context():
+        db.session.execute(update(Exercise.__table__).where(Exercise.id == 51).values(instructions=instructions))
+        bump_versions('exercises')
+        db.session.commit()
+    assert client.get('/exercises/51').get_json()['instructions'] == instructions
+
+
+def test_entries_expire_after_ttl(client, cached, monkeypatch):
+    client.get('/exercises/52')
+    client.get('/exercises/52')
+    assert catalog_cache.hits == 1
+
+    later = time.time() + cached.ttl + 1
+    monotonic_later = time.monotonic() + cached.ttl + 1
+    monkeypatch.setattr(time, 'time', lambda: later)
+    monkeypatch.setattr(time, 'monotonic', lambda: monotonic_later)
+    client.get('/exercises/52')
+    assert (catalog_cache.misses, catalog_cache.hits) == (2, 1)
@@ -0,0 +1,47 @@
+from conftest import ADMIN_ID, USER_ID, login
+
+
+def test_clone_copies_exercise_rows_with_one_insert(client, record_statements):
+    login(client, USER_ID)
+    source = client.get('/workouts/8/full').get_json()
+    with record_statements() as recorder:
+        response = client.post('/workouts/8/clone', json={'name': 'My copy'})
+    assert response.status_code == 201
+    clone = response.get_json()
+    assert clone['user_id'] == USER_ID and clone['name'] == 'My copy' and clone['id'] != 8
+    assert [(row['exercise_id'], row['sets'], row['reps']) for row in clone['workout_exercises']] == \
+        [(row['exercise_id'], row['sets'], row['reps']) for row in source['workout_exercises']]
+    inserts = [statement for statement, _ in recorder.statements if statement.startswith('INSERT INTO workout_exercises')]
+    assert len(inserts) == 1 and 'SELECT' in inserts[0]
+
+
+def test_clone_of_another_users_workout_is_forbidden(client):
+    login(client, USER_ID)
+    assert client.post('/workouts/111/clone').status_code == 403
+
+
+def test_clone_defaults_to_the_source_and_is_independent(client):
+    login(client, USER_ID)
+    source = client.get('/workouts/9/full').get_json()
+    clone = client.post('/workouts/9/clone').get_json()
+    for field in ('name', 'description', 'duration', 'instructor_id'):
+        assert clone[field] == source[field]
+
+    # Editing the copy leaves the template alone
+    assert client.put(f"/workouts/{clone['id']}/exercises", json=[]).status_code == 200
+    assert client.get('/workouts/9/full').get_json()['workout_exercises'] == source['workout_exercises']
+
+
+def test_clone_requires_login_and_known_fields(client):
+    assert client.post('/workouts/9/clone').status_code == 401
+    login(client, USER_ID)
+    response = client.post('/workouts/9/clone', json={'user_id': 3})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Unknown fields: user_id'
+
+
+def test_admin_can_clone_any_workout(client):
+    login(client, ADMIN_ID)
+    response = client.post('/workouts/111/clone')
+    assert response.status_code == 201
+    assert response.get_json()['user_id'] == ADMIN_ID
@@ -0,0 +1,47 @@
+from conftest import ADMIN_ID, USER_ID, login
+
+URL = '/exercises/70'
+
+
+def test_matching_if_none_match_is_not_modified(client):
+    response = client.get(URL)
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    cached = client.get(URL, headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == etag
+    assert client.get(URL, headers={'If-None-Match': '"something-else"'}).status_code == 200
+
+
+def test_patch_changes_the_etag(client):
+    old = client.get(URL).headers['ETag']
+    assert client.patch(URL, json={'instructions': 'Slower still'}).status_code == 200
+
+    response = client.get(URL, headers={'If-None-Match': old})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != old
+    assert response.get_json()['instructions'] == 'Slower still'
+
+
+def test_instructor_patch_changes_exercise_etags(client):
+    # Exercises embed their instructor
+    old = client.get(URL).headers['ETag']
+    instructor_id = client.get(URL).get_json()['instructor_id']
+    assert client.patch(f'/instructors/{instructor_id}', json={'bio': 'Renamed coach'}).status_code == 200
+    assert client.get(URL, headers={'If-None-Match': old}).status_code == 200
+
+
+def test_personal_workouts_leave_the_catalog_etag_alone(client):
+    login(client, USER_ID)
+    etag = client.get('/workouts').headers['ETag']
+    created = client.post('/workouts', json={'name': 'Mine', 'duration': 15, 'instructor_id': 1}).get_json()
+    client.patch(f"/workouts/{created['id']}", json={'duration': 16})
+    clone = client.post('/workouts/5/clone').get_json()
+    client.delete(f"/workouts/{clone['id']}")
+    assert client.get('/workouts', headers={'If-None-Match': etag}).status_code == 304
+
+    login(client, ADMIN_ID)
+    assert client.patch('/workouts/5', json={'duration': 44}).status_code == 200
+    assert client.get('/workouts', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,73 @@
+from sqlalchemy import update
+
+from conditional import bump_versions
+from facets import FacetIndex, exercise_facets
+from models import db, Exercise
+
+EXERCISE = {'name': 'Facet probe', 'category': 'Pilates', 'muscle_group': 'Neck', 'difficulty': 'Beginner',
+            'instructions': 'Nod', 'instructor_id': 1}
+
+
+def facets(client, query=''):
+    response = client.get(f'/exercises/facets?{query}')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_counts_follow_create_update_and_delete(client):
+    facets(client)  # the index is built
+    id = client.post('/exercises', json=EXERCISE).get_json()['id']
+    data = facets(client, 'category=Pilates')
+    assert (data['total'], data['ids']) == (1, [id])
+    assert data['facets']['muscle_group'] == {'Neck': 1}
+
+    client.patch(f'/exercises/{id}', json={'category': 'Barre'})
+    counts = facets(client)['facets']['category']
+    assert 'Pilates' not in counts
+    assert counts['Barre'] == 1
+
+    client.delete(f'/exercises/{id}')
+    assert 'Barre' not in facets(client)['facets']['category']
+    assert 'Neck' not in facets(client)['facets']['muscle_group']
+
+
+def test_write_by_another_worker_rebuilds(app, client):
+    facets(client)
+    id = client.post('/exercises', json={**EXERCISE, 'category': 'Tai Chi'}).get_json()['id']
+    with app.app_context():
+        db.session.execute(update(Exercise.__table__).where(Exercise.id == id).values(category='Qigong'))
+        bump_versions('exercises')
+        db.session.commit()
+    counts = facets(client)['facets']['category']
+    assert 'Tai Chi' not in counts
+    assert counts['Qigong'] == 1
+    client.delete(f'/exercises/{id}')
+
+
+def test_a_facets_own_selection_does_not_narrow_its_counts(client):
+    data = facets(client, 'category=Yoga,Cardio&difficulty=Advanced')
+    categories = data['facets']['category']
+    # Other categories still show what selecting them would add
+    assert {'Yoga', 'Cardio', 'Bodyweight', 'Weightlifting'} <= set(categories)
+    assert data['total'] == categories['Yoga'] + categories['Cardio']
+    assert set(data['facets']['difficulty']) >= {'Beginner', 'Advanced'}
+    assert sum(data['facets']['muscle_group'].values()) == data['total']
+
+
+def test_bad_instructor_id_is_rejected(client):
+    assert client.get('/exercises/facets?instructor_id=x').status_code == 400
+
+
+def test_rebuild_matches_the_incremental_index(app):
+    with app.app_context():
+        rebuilt = FacetIndex(Exercise, 'exercises', exercise_facets.facets)
+        rebuilt.rebuild(version=2)
+        incremental = FacetIndex(Exercise, 'exercises', exercise_facets.facets)
+        for id, values in rebuilt.values.items():
+            incremental._add(id, values)
+        assert rebuilt.all == incremental.all
+        assert rebuilt.bits == incremental.bits
+
+        # A slower rebuild of an older version does not replace a newer one
+        rebuilt.rebuild(version=1)
+        assert rebuilt.version == 2
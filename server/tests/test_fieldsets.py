@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.mark.parametrize('url', [
+    '/exercises?fields=name,difficulty&limit=20',
+    '/exercises?fields=name,difficulty&stream=1',
+    '/exercises?fields=name,difficulty&ids=1,2,3',
+])
+def test_sparse_fieldsets_select_only_requested_columns(client, record_statements, url):
+    with record_statements() as recorder:
+        response = client.get(url)
+        data = response.get_json()
+    assert response.status_code == 200
+    items = data['items'] if isinstance(data, dict) else data
+    assert items and all(set(item) == {'id', 'name', 'difficulty'} for item in items)
+    selects = [statement for statement, _ in recorder.statements if 'FROM exercises' in statement]
+    assert selects and not any('instructions' in statement for statement in selects)
+    # The instructor is neither serialized nor loaded
+    assert not any('FROM instructors' in statement for statement, _ in recorder.statements)
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.get('/exercises?fields=name,password')
+    assert response.status_code == 400
+    assert 'Unknown fields: password' in response.get_json()['error']
+
+
+def test_cursor_works_without_the_sort_column(client):
+    # The sort column is loaded for the cursor but not returned
+    first = client.get('/exercises?fields=id&sort=-name&limit=2').get_json()
+    assert all(set(item) == {'id'} for item in first['items'])
+    second = client.get(f"/exercises?fields=id&sort=-name&limit=2&cursor={first['next_cursor']}").get_json()
+    both = [item['id'] for item in first['items'] + second['items']]
+    full = client.get('/exercises?fields=id&sort=-name&limit=4').get_json()
+    assert both == [item['id'] for item in full['items']]
+
+
+def test_detail_returns_only_requested_fields(client):
+    data = client.get('/exercises/50?fields=name,instructor').get_json()
+    assert set(data) == {'id', 'name', 'instructor'}
+    assert data['instructor']['id'] == client.get('/exercises/50').get_json()['instructor_id']
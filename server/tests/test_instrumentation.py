@@ -0,0 +1,39 @@
+import re
+
+import pytest
+
+from conftest import ADMIN_ID, configured_app, login
+
+
+@pytest.fixture(scope='module')
+def instrumented(app):
+    return configured_app(INSTRUMENTATION='1')
+
+
+def metric(client, name, route):
+    text = client.get('/metrics').get_data(as_text=True)
+    match = re.search(rf'^fitforge_{name}{{method="GET",route="{re.escape(route)}"}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_server_timing_reports_queries(instrumented, record_statements):
+    client = instrumented.test_client()
+    with record_statements() as recorder:
+        response = client.get('/exercises/60')
+    timing = response.headers['Server-Timing']
+    assert f'desc="{recorder.count} queries"' in timing
+    assert re.search(r'\bser;dur=[\d.]+, app;dur=[\d.]+$', timing)
+    assert metric(client, 'sql_queries_count', '/exercises/<int:id>') >= 1
+
+
+@pytest.mark.parametrize('url', ['/exercises?stream=1', '/admin/export'])
+def test_streamed_queries_are_recorded(instrumented, record_statements, url):
+    client = login(instrumented.test_client(), ADMIN_ID)
+    route = url.split('?')[0]
+    before = metric(client, 'sql_queries_sum', route)
+    with record_statements() as recorder:
+        response = client.get(url)
+        assert response.data.endswith((b']', b'\n'))
+        response.close()
+    assert metric(client, 'sql_queries_sum', route) - before == recorder.count
+    assert 'Server-Timing' not in response.headers
@@ -0,0 +1,30 @@
+from pagination import MAX_IDS
+
+
+def test_results_follow_the_requested_order(client):
+    response = client.get('/exercises?ids=12,999999,3,12')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [row['id'] for row in data] == [12, 999999, 3, 12]
+    assert data[1] == {'id': 999999, 'error': 'Not found'}
+    assert data[0]['name'] == 'Exercise 12'
+    assert data[0]['instructor']['id'] == data[0]['instructor_id']
+
+
+def test_personal_workouts_are_not_found(client):
+    # Like GET /workouts, only templates are listed
+    data = client.get('/workouts?ids=106,4').get_json()
+    assert data[0] == {'id': 106, 'error': 'Not found'}
+    assert data[1]['id'] == 4
+
+
+def test_fields_apply_to_each_result(client):
+    data = client.get('/instructors?ids=2,1&fields=id,name').get_json()
+    assert data == [{'id': 2, 'name': 'Instructor 2'}, {'id': 1, 'name': 'Instructor 1'}]
+
+
+def test_bad_ids_are_rejected(client):
+    assert client.get('/exercises?ids=1,x').status_code == 400
+    assert client.get('/exercises?ids=,').status_code == 400
+    too_many = ','.join(str(id) for id in range(1, MAX_IDS + 2))
+    assert client.get(f'/exercises?ids={too_many}').status_code == 400
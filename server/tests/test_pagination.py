@@ -0,0 +1,70 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, insert
+
+from conftest import login
+from models import db, WorkoutSession
+
+OWNER_ID = 150  # not used by the other tests
+
+
+def cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def walk(client, url):
+    ids, next_cursor = [], None
+    while True:
+        page = client.get(url + (f'&cursor={next_cursor}' if next_cursor else '')).get_json()
+        ids += [row['id'] for row in page['items']]
+        next_cursor = page['next_cursor']
+        if next_cursor is None:
+            return ids
+
+
+@pytest.fixture
+def undated_sessions(app):
+    """Sessions with a NULL created_at alongside the owner's dated ones."""
+    sessions = WorkoutSession.__table__
+    with app.app_context():
+        rows = [{'user_id': OWNER_ID, 'started_at': datetime(2025, 2, 1), 'created_at': None} for _ in range(3)]
+        db.session.execute(insert(sessions), rows)
+        db.session.commit()
+    yield
+    with app.app_context():
+        db.session.execute(delete(sessions).where(sessions.c.user_id == OWNER_ID, sessions.c.created_at.is_(None)))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('sort', ['created_at', '-created_at'])
+def test_pages_cross_null_sort_values(client, undated_sessions, sort):
+    login(client, OWNER_ID)
+    everything = [row['id'] for row in client.get(f'/workout-sessions?sort={sort}').get_json()]
+    assert len(everything) == 5
+    assert walk(client, f'/workout-sessions?sort={sort}&limit=2') == everything
+
+
+@pytest.mark.parametrize('url,value', [
+    ('/exercises?sort=created_at', 'x'),
+    ('/exercises?sort=name', [1, 2]),
+    ('/exercises?sort=name', {'a': 1}),
+    ('/workouts?sort=duration', 'x'),
+    ('/workouts?sort=duration', [30]),
+])
+def test_cursor_values_must_match_the_sort_column(client, url, value):
+    sort = url.split('sort=')[1]
+    response = client.get(f"{url}&cursor={cursor({'s': sort, 'v': value, 'id': 1})}")
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
+
+
+def test_bad_cursors_are_rejected(client):
+    assert client.get('/exercises?sort=created_at&cursor=%%%').status_code == 400
+
+    # A cursor from another sort order says so rather than 'Invalid cursor'
+    next_cursor = client.get('/exercises?sort=name&limit=1').get_json()['next_cursor']
+    response = client.get(f'/exercises?sort=-name&cursor={next_cursor}')
+    assert response.get_json() == {'error': 'cursor does not match sort'}
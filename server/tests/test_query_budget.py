@@ -0,0 +1,215 @@
+import pytest
+from sqlalchemy import text
+
+from conftest import ADMIN_ID, USER_ID, EXERCISES, login, user_email
+from models import db, UserExercise
+
+# Templates are ids 1-100; user n owns workouts 100 + 5(n-1) + 1..5 and
+# user-exercises 20(n-1) + 1..20. Write cases use distinct rows so the order
+# tests run in does not matter.
+ADMIN = 'admin'
+USER = 'user'
+ANON = None
+
+IMPORT_BODY = (
+    b'{"table": "instructors", "row": {"id": 900, "name": "Imported", "specialty": "Yoga", "bio": null, '
+    b'"created_at": "2025-01-01T00:00:00"}}\n'
+    b'{"table": "exercises", "row": {"id": 9000, "name": "Imported Flow", "category": "Yoga", '
+    b'"muscle_group": "Core", "difficulty": "Beginner", "instructions": "Breathe", "instructor_id": 900, '
+    b'"created_at": "2025-01-01T00:00:00"}}\n'
+)
+
+# A tracker uploading a session: 10 sets of each of 20 exercises, weights
+# rising so some beat the stored personal records
+SET_LOGS = [{'exercise_id': 100 + n % 20, 'reps': 5, 'weight': 50.0 + n, 'client_id': f'watch-{n}'} for n in range(200)]
+
+# (method, rule) -> (login as, url, body (JSON, or bytes sent as is), max SQL statements)
+BUDGETS = {
+    ('GET', '/'): (ANON, '/', None, 0),
+    ('GET', '/metrics'): (ANON, '/metrics', None, 0),
+    ('GET', '/current-user'): (USER, '/current-user', None, 1),
+    ('POST', '/register'): (ANON, '/register', {'name': 'New', 'email': 'new@fitforge.test', 'password': 'pw', 'fitness_level': 'Beginner'}, 3),
+    ('POST', '/login'): (ANON, '/login', {'email': user_email(USER_ID), 'password': 'password123'}, 1),
+    ('POST', '/logout'): (USER, '/logout', None, 0),
+
+    ('GET', '/users'): (ANON, '/users?limit=50', None, 1),
+    ('POST', '/users'): (ANON, '/users', {'name': 'Plain', 'email': 'plain@fitforge.test', 'password_hash': 'x', 'fitness_level': 'Beginner'}, 2),
+    ('GET', '/users/<int:id>'): (ANON, '/users/3', None, 1),
+    ('PATCH', '/users/<int:id>'): (ANON, '/users/3', {'fitness_level': 'Advanced'}, 3),
+    ('DELETE', '/users/<int:id>'): (ANON, '/users/200', None, 18),
+
+    ('GET', '/exercises'): (ANON, '/exercises', None, 3),
+    ('POST', '/exercises'): (ANON, '/exercises', {'name': 'Burpee', 'category': 'Cardio', 'muscle_group': 'Full Body', 'difficulty': 'Beginner', 'instructions': 'Jump', 'instructor_id': 1}, 7),
+    ('GET', '/exercises/<int:id>'): (ANON, '/exercises/5', None, 3),
+    ('PATCH', '/exercises/<int:id>'): (ANON, '/exercises/999', {'difficulty': 'Advanced'}, 8),
+    ('DELETE', '/exercises/<int:id>'): (ANON, f'/exercises/{EXERCISES}', None, 12),
+    ('GET', '/exercises/search'): (ANON, '/exercises/search?q=exercise', None, 4),
+    ('GET', '/exercises/facets'): (ANON, '/exercises/facets?difficulty=Beginner', None, 4),
+
+    ('GET', '/instructors'): (ANON, '/instructors', None, 2),
+    ('POST', '/instructors'): (ANON, '/instructors', {'name': 'Coach', 'specialty': 'Yoga', 'bio': 'Bio'}, 4),
+    ('GET', '/instructors/<int:id>'): (ANON, '/instructors/2', None, 2),
+    ('PATCH', '/instructors/<int:id>'): (ANON, '/instructors/3', {'bio': 'Updated'}, 5),
+    ('DELETE', '/instructors/<int:id>'): (ANON, '/instructors/21', None, 6),
+
+    ('GET', '/workouts'): (ANON, '/workouts', None, 4),
+    ('POST', '/workouts'): (USER, '/workouts', {'name': 'Mine', 'description': 'New', 'duration': 30, 'instructor_id': 1}, 8),
+    ('GET', '/workouts/<int:id>'): (ANON, '/workouts/7', None, 3),
+    ('PATCH', '/workouts/<int:id>'): (USER, '/workouts/107', {'duration': 50}, 10),
+    ('DELETE', '/workouts/<int:id>'): (USER, '/workouts/108', None, 10),
+    ('GET', '/workouts/search'): (ANON, '/workouts/search?q=template', None, 5),
+    ('GET', '/workouts/<int:id>/full'): (ANON, '/workouts/7/full', None, 4),
+    ('GET', '/workouts/full'): (ANON, '/workouts/full?ids=' + ','.join(str(id) for id in range(1, 51)), None, 4),
+    ('POST', '/workouts/<int:id>/exercises'): (USER, '/workouts/109/exercises', [{'exercise_id': 1 + n, 'sets': 3, 'reps': 10} for n in range(20)], 10),
+    ('PUT', '/workouts/<int:id>/exercises'): (USER, '/workouts/110/exercises', [{'exercise_id': 1 + n, 'sets': 3, 'reps': 10} for n in range(20)], 11),
+    ('POST', '/workouts/<int:id>/clone'): (USER, '/workouts/7/clone', {'name': 'My copy'}, 12),
+
+    ('POST', '/workout-exercises'): (ANON, '/workout-exercises', {'workout_id': 106, 'exercise_id': 5, 'sets': 3, 'reps': 8}, 9),
+    ('PATCH', '/workout-exercises/<int:id>'): (ANON, '/workout-exercises/1', {'reps': 12}, 9),
+
+    ('GET', '/user-exercises'): (USER, '/user-exercises?limit=100', None, 4),
+    ('POST', '/user-exercises'): (USER, '/user-exercises', {'exercise_id': 500, 'personal_record': 80.0}, 6),
+    ('DELETE', '/user-exercises/<int:id>'): (USER, '/user-exercises/22', None, 4),
+
+    ('GET', '/workout-sessions'): (USER, '/workout-sessions', None, 1),
+    ('POST', '/workout-sessions'): (USER, '/workout-sessions', {'workout_id': 106, 'started_at': '2025-02-01T07:30:00Z'}, 3),
+    ('GET', '/workout-sessions/<int:id>'): (USER, '/workout-sessions/3', None, 2),
+    ('PATCH', '/workout-sessions/<int:id>'): (USER, '/workout-sessions/3', {'ended_at': '2025-02-01T08:30:00Z'}, 3),
+    ('DELETE', '/workout-sessions/<int:id>'): (USER, '/workout-sessions/4', None, 3),
+    ('POST', '/workout-sessions/<int:id>/sets'): (USER, '/workout-sessions/3/sets', SET_LOGS, 5),
+
+    ('GET', '/admin/export'): (ADMIN, '/admin/export?tables=instructors,exercises', None, 3),
+    ('POST', '/admin/import'): (ADMIN, '/admin/import', IMPORT_BODY, 20),
+
+    ('GET', '/my-exercises'): (USER, '/my-exercises', None, 4),
+    ('GET', '/my-workouts'): (USER, '/my-workouts', None, 4),
+    ('GET', '/analytics/progress'): (USER, '/analytics/progress?bucket=month&group_by=muscle_group', None, 1),
+    ('GET', '/sync'): (USER, '/sync?since=0', None, 8),
+}
+
+
+def registered_routes(app):
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == 'static':
+            continue
+        for method in rule.methods - {'HEAD', 'OPTIONS'}:
+            yield method, rule.rule
+
+
+def test_every_route_has_a_budget(app):
+    missing = sorted(set(registered_routes(app)) - set(BUDGETS))
+    assert not missing, f'Add query budgets for {missing}'
+
+
+@pytest.mark.parametrize('method,rule', sorted(BUDGETS), ids=lambda value: value)
+def test_query_budget(app, client, record_statements, method, rule):
+    if (method, rule) not in set(registered_routes(app)):
+        pytest.skip(f'{rule} is not registered in this configuration')
+    as_user, url, body, budget = BUDGETS[(method, rule)]
+    if as_user == USER:
+        login(client, USER_ID)
+    elif as_user == ADMIN:
+        login(client, ADMIN_ID)
+
+    with record_statements() as recorder:
+        if isinstance(body, bytes):
+            response = client.open(url, method=method, data=body, content_type='application/x-ndjson')
+        else:
+            response = client.open(url, method=method, json=body)
+        if response.is_streamed:
+            response.get_data()  # statements run while the body is generated
+
+    assert response.status_code < 400, response.get_data(as_text=True)
+    statements = '\n'.join(statement for statement, _ in recorder.statements)
+    assert recorder.count <= budget, f'{method} {url} ran {recorder.count} statements (budget {budget}):\n{statements}'
+
+
+# Streams load instructors per batch of 1000 rows; other tests add exercises,
+# so the catalog may span two batches
+@pytest.mark.parametrize('url,budget', [
+    ('/exercises?stream=1', 4),
+    ('/workouts?stream=1&sort=-duration', 4),
+    ('/users?stream=1&fitness_level=Beginner', 1),
+])
+def test_streamed_list_budget(app, client, record_statements, url, budget):
+    with record_statements() as recorder:
+        response = client.get(url)
+        data = response.get_json()  # consumes the stream inside the recorder
+    assert response.status_code == 200
+    assert data and isinstance(data, list)
+    assert recorder.count <= budget, f'{url} ran {recorder.count} statements (budget {budget})'
+
+
+def query_plans(recorder, kinds=('SELECT',)):
+    plans = []
+    connection = db.session.connection()
+    for statement, parameters in recorder.statements:
+        if not statement.lstrip().upper().startswith(kinds):
+            continue
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+        plans.append((statement, [row[-1] for row in rows]))
+    return plans
+
+
+def assert_no_full_scans(plans, tables):
+    for statement, details in plans:
+        for detail in details:
+            # "SCAN users" is a full table scan; "SCAN users USING INDEX ..."
+            # and "SEARCH ..." are index lookups
+            words = detail.split()
+            if words[0] == 'SCAN' and words[1] in tables and 'USING' not in words:
+                pytest.fail(f'Full scan of {words[1]}: {detail}\n{statement}')
+
+
+@pytest.mark.parametrize('url,tables', [
+    ('/my-workouts', ('workouts', 'users', 'instructors')),
+    ('/my-exercises', ('user_exercises', 'users', 'exercises', 'instructors')),
+])
+def test_my_lists_use_indexes(app, client, record_statements, url, tables):
+    login(client, USER_ID)
+    with record_statements() as recorder:
+        assert client.get(url).status_code == 200
+    with app.app_context():
+        assert_no_full_scans(query_plans(recorder), tables)
+
+
+def test_deletes_clean_up_session_references_by_index(app, client, record_statements):
+    login(client, USER_ID)
+    exercise = client.post('/exercises', json={'name': 'Doomed', 'category': 'Cardio', 'muscle_group': 'Legs',
+                                               'difficulty': 'Beginner', 'instructions': 'Run', 'instructor_id': 1})
+    workout = client.post('/workouts', json={'name': 'Doomed', 'duration': 10, 'instructor_id': 1})
+    with record_statements() as recorder:
+        assert client.delete(f"/exercises/{exercise.get_json()['id']}").status_code == 204
+        assert client.delete(f"/workouts/{workout.get_json()['id']}").status_code == 204
+    with app.app_context():
+        plans = query_plans(recorder, kinds=('DELETE', 'UPDATE'))
+        assert any('set_logs' in statement for statement, _ in plans)
+        assert any('workout_sessions' in statement for statement, _ in plans)
+        assert_no_full_scans(plans, ('set_logs', 'workout_sessions'))
+
+
+def test_login_looks_up_email_by_index(app, client, record_statements):
+    with record_statements() as recorder:
+        login(client, USER_ID)
+    with app.app_context():
+        plans = query_plans(recorder)
+        assert plans
+        assert_no_full_scans(plans, ('users',))
+
+
+def test_user_exercise_duplicate_check_uses_unique_index(app, client):
+    login(client, USER_ID)
+    with app.app_context():
+        existing = db.session.execute(text(
+            'SELECT exercise_id FROM user_exercises WHERE user_id = :user_id LIMIT 1'
+        ), {'user_id': USER_ID}).scalar()
+        lookup = UserExercise.query.filter_by(user_id=USER_ID, exercise_id=existing).statement
+        compiled = lookup.compile(db.engine)
+        details = [row[-1] for row in db.session.connection().exec_driver_sql(
+            'EXPLAIN QUERY PLAN ' + str(compiled), tuple(compiled.params[name] for name in compiled.positiontup)
+        )]
+        assert any('uq_user_exercises_user_id_exercise_id' in detail for detail in details), details
+
+    response = client.post('/user-exercises', json={'exercise_id': existing})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Exercise already in your profile'
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from cache import MemoryBackend, catalog_cache
+from conftest import configured_app
+from replica import PIN_KEY, SnapshotReplica
+
+INSTRUCTOR = '/instructors/7'
+
+
+@pytest.fixture(scope='module')
+def replica_app(app, tmp_path_factory):
+    """app.py configured with READ_REPLICA=snapshot over the test database.
+
+    The snapshot is only refreshed when a test asks for it.
+    """
+    path = str(tmp_path_factory.mktemp('replica') / 'replica.db')
+    replica_app = configured_app(READ_REPLICA='snapshot', REPLICA_SNAPSHOT_PATH=path,
+                                 REPLICA_REFRESH_SECONDS='3600', REPLICA_PIN_SECONDS='60')
+    source = app.config['SQLALCHEMY_DATABASE_URI'][len('sqlite:///'):]
+    replica_app.snapshot = SnapshotReplica(source, path, 3600)
+    return replica_app
+
+
+@pytest.fixture
+def cached():
+    catalog_cache.backend = MemoryBackend(maxsize=100, ttl=300)
+    yield
+    catalog_cache.backend = None
+
+
+def refresh(snapshot):
+    os.utime(snapshot.path, (0, 0))  # stale, so refresh copies
+    assert snapshot.refresh(wait=True)
+
+
+def test_reads_use_the_replica_until_it_is_refreshed(replica_app, cached):
+    writer, reader = replica_app.test_client(), replica_app.test_client()
+    before = reader.get(INSTRUCTOR)
+    assert writer.patch(INSTRUCTOR, json={'bio': 'Fresh'}).status_code == 200
+    catalog_cache.clear()  # the lagging read below is a cache miss
+
+    # The writer is pinned to the primary and reads its own write
+    pinned = writer.get(INSTRUCTOR)
+    assert pinned.get_json()['bio'] == 'Fresh'
+    assert pinned.headers['ETag'] != before.headers['ETag']
+
+    # Everyone else reads the snapshot: old body, under the old validator
+    lagging = reader.get(INSTRUCTOR)
+    assert lagging.get_json() == before.get_json()
+    assert lagging.headers['ETag'] == before.headers['ETag']
+    assert reader.get(INSTRUCTOR, headers={'If-None-Match': before.headers['ETag']}).status_code == 304
+
+    refresh(replica_app.snapshot)
+    current = reader.get(INSTRUCTOR)
+    assert current.get_json()['bio'] == 'Fresh'
+    assert current.headers['ETag'] == pinned.headers['ETag']
+
+
+def test_pin_expires(replica_app):
+    writer = replica_app.test_client()
+    assert writer.patch(INSTRUCTOR, json={'bio': 'Pinned'}).status_code == 200
+    with writer.session_transaction() as session:
+        assert session[PIN_KEY] > 0
+        session[PIN_KEY] = 0  # as if REPLICA_PIN_SECONDS had passed
+    # Back on the snapshot, which has not seen the write yet
+    assert writer.get(INSTRUCTOR).get_json()['bio'] != 'Pinned'
+    refresh(replica_app.snapshot)
+    assert writer.get(INSTRUCTOR).get_json()['bio'] == 'Pinned'
+
+
+def test_search_reads_ids_and_rows_from_the_replica(replica_app):
+    writer, reader = replica_app.test_client(), replica_app.test_client()
+    assert writer.patch('/exercises/61', json={'name': 'Marzipan twist'}).status_code == 200
+
+    # The snapshot has neither the new name nor its index entry: no stale
+    # 'Exercise 61' row for a search it does not match
+    assert reader.get('/exercises/search?q=marzipan').get_json() == []
+    assert [row['name'] for row in writer.get('/exercises/search?q=marzipan').get_json()] == ['Marzipan twist']
+
+    refresh(replica_app.snapshot)
+    assert [row['name'] for row in reader.get('/exercises/search?q=marzipan').get_json()] == ['Marzipan twist']
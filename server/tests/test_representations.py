@@ -0,0 +1,43 @@
+import gzip
+
+import brotli
+
+LIST = '/instructors'  # large enough to compress
+ITEM = '/instructors/7'  # below COMPRESS_MIN_SIZE
+
+
+def test_large_responses_are_compressed(client):
+    plain = client.get(LIST)
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    gzipped = client.get(LIST, headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gzipped.data) == plain.data
+    assert gzipped.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+
+    compressed = client.get(LIST, headers={'Accept-Encoding': 'gzip, br'})
+    assert compressed.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(compressed.data) == plain.data
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+
+
+def test_small_responses_are_sent_as_is(client):
+    response = client.get(ITEM, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_streams_are_compressed(client):
+    plain = client.get('/exercises?stream=1')
+    gzipped = client.get('/exercises?stream=1', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gzipped.data) == plain.data
+
+
+def test_compressed_etag_revalidates(client):
+    etag = client.get(LIST, headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    assert etag.endswith('-gzip"')
+    response = client.get(LIST, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
@@ -0,0 +1,53 @@
+import pytest
+
+import search
+
+EXERCISE = {'category': 'Yoga', 'muscle_group': 'Core', 'difficulty': 'Beginner', 'instructor_id': 1}
+
+
+@pytest.fixture(scope='module')
+def ranked(app):
+    """Two exercises mentioning 'quillwort': the older one only in its
+    instructions, the newer one in its name."""
+    client = app.test_client()
+    body = client.post('/exercises', json={**EXERCISE, 'name': 'Stretch', 'instructions': 'Reach like quillwort'})
+    name = client.post('/exercises', json={**EXERCISE, 'name': 'Quillwort flow', 'instructions': 'Breathe'})
+    return name.get_json()['id'], body.get_json()['id']
+
+
+def ids(client, q, resource='exercises'):
+    response = client.get(f'/{resource}/search?q={q}')
+    assert response.status_code == 200
+    return [row['id'] for row in response.get_json()]
+
+
+def test_name_matches_rank_first(client, ranked):
+    assert ids(client, 'quillwort') == list(ranked)
+
+
+def test_last_term_is_a_prefix(client, ranked):
+    assert ids(client, 'quillw') == list(ranked)
+    assert ids(client, 'quillwort flo') == [ranked[0]]
+    # Only the last term is a prefix
+    assert ids(client, 'quillw flow') == []
+
+
+def test_updates_are_reindexed(client, ranked):
+    client.patch(f'/exercises/{ranked[1]}', json={'instructions': 'Reach up'})
+    assert ids(client, 'quillwort') == [ranked[0]]
+    client.patch(f'/exercises/{ranked[1]}', json={'instructions': 'Reach like quillwort'})
+
+
+def test_substring_fallback_without_fts(client, ranked, monkeypatch):
+    monkeypatch.setattr(search, '_fts_ready_on', lambda engine: False)
+    # id order, and any substring matches
+    assert ids(client, 'illwor') == sorted(ranked)
+
+
+def test_workout_search_is_limited_to_templates(client):
+    assert ids(client, 'personal', 'workouts') == []
+    assert len(ids(client, 'template&limit=3', 'workouts')) == 3
+
+
+def test_query_is_required(client):
+    assert client.get('/exercises/search?q=').status_code == 400
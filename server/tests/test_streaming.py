@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from models import Instructor
+from serializers import serialize
+from streaming import stream_response
+
+
+@pytest.mark.parametrize('url', [
+    '/exercises',
+    '/workouts?sort=-duration',
+    '/exercises?difficulty=Beginner,Advanced&sort=name',
+])
+def test_stream_matches_the_list(client, url):
+    streamed = client.get(url + ('&' if '?' in url else '?') + 'stream=1')
+    assert streamed.is_streamed
+    assert streamed.get_json() == client.get(url).get_json()
+
+
+def test_stream_cannot_be_paginated(client):
+    assert client.get('/exercises?stream=1&limit=10').status_code == 400
+
+
+def stream_instructors(app, **kwargs):
+    with app.test_request_context():
+        return b''.join(stream_response(Instructor.query.order_by(Instructor.id), **kwargs).response)
+
+
+def test_batches_are_joined_into_one_array(app):
+    with app.app_context():
+        expected = [serialize(instructor) for instructor in Instructor.query.order_by(Instructor.id)]
+    body = stream_instructors(app, batch_size=3)
+    assert json.loads(body) == expected
+
+
+def test_failure_leaves_the_array_unterminated(app):
+    def serialize_row(instructor):
+        if instructor.id == 5:
+            raise ValueError('boom')
+        return serialize(instructor)
+
+    body = stream_instructors(app, batch_size=2, serialize_row=serialize_row)
+    assert body.startswith(b'[{')
+    assert not body.endswith(b']')
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert, select, update
+
+from conftest import EXERCISES_PER_WORKOUT, USER_ID, login
+from models import db
+from sync import change_log, prune_changes
+
+OTHER_ID = 3  # owns workouts 111-115
+
+
+def sync(client, since):
+    response = client.get(f'/sync?since={since}')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_sync_returns_rows_changed_since_cursor(client):
+    login(client, OTHER_ID)
+    cursor = client.get('/sync').get_json()['next_cursor']
+
+    created = client.post('/workouts', json={'name': 'Sync', 'duration': 20, 'instructor_id': 1}).get_json()
+    assert client.patch('/workouts/111', json={'duration': 42}).status_code == 200
+    response = client.put(f"/workouts/{created['id']}/exercises", json=[{'exercise_id': 7, 'sets': 3, 'reps': 5}])
+    assert response.status_code == 200
+    assert client.delete('/workouts/112').status_code == 204
+
+    data = sync(client, cursor)
+    workouts = {workout['id']: workout for workout in data['changes']['workouts']}
+    assert set(workouts) == {created['id'], 111}
+    assert workouts[111]['duration'] == 42
+    assert workouts[111]['updated_at'] > workouts[111]['created_at']
+    assert 'user' not in workouts[111]  # flat rows, no embedded relationships
+    assert [row['exercise_id'] for row in data['changes']['workout_exercises']] == [7]
+    assert data['deleted']['workouts'] == [112]
+    assert len(data['deleted']['workout_exercises']) == EXERCISES_PER_WORKOUT
+    assert data['has_more'] is False
+
+    again = sync(client, data['next_cursor'])
+    assert again == {'changes': {}, 'deleted': {}, 'next_cursor': data['next_cursor'], 'has_more': False}
+
+
+def test_sync_sees_catalog_changes_but_not_other_users_rows(client):
+    login(client, OTHER_ID)
+    cursor = client.get('/sync').get_json()['next_cursor']
+
+    login(client, USER_ID)
+    assert client.post('/user-exercises', json={'exercise_id': 900}).status_code == 201
+    assert client.patch('/exercises/900', json={'difficulty': 'Intermediate'}).status_code == 200
+
+    login(client, OTHER_ID)
+    data = sync(client, cursor)
+    assert list(data['changes']) == ['exercises']
+    assert [row['id'] for row in data['changes']['exercises']] == [900]
+    assert data['deleted'] == {}
+
+
+def test_sync_rejects_unknown_cursors(client):
+    login(client, OTHER_ID)
+    assert client.get('/sync?since=abc').status_code == 400
+    latest = int(client.get('/sync').get_json()['next_cursor'])
+    assert client.get(f'/sync?since={latest + 1000}').status_code == 410
+
+
+@pytest.fixture
+def restore_change_log(app):
+    with app.app_context():
+        rows = [dict(row) for row in db.session.execute(select(change_log)).mappings()]
+    yield
+    with app.app_context():
+        db.session.execute(delete(change_log))
+        db.session.execute(insert(change_log), rows)
+        db.session.commit()
+
+
+def test_pruned_cursors_are_gone(app, client, restore_change_log):
+    login(client, OTHER_ID)
+    stale = client.get('/sync').get_json()['next_cursor']
+    assert client.patch('/workouts/113', json={'duration': 31}).status_code == 200
+    kept = client.get('/sync').get_json()['next_cursor']
+    assert client.patch('/workouts/113', json={'duration': 32}).status_code == 200
+
+    with app.app_context():
+        db.session.execute(update(change_log).where(change_log.c.id <= int(kept)).values(changed_at=datetime(2000, 1, 1)))
+        db.session.commit()
+        assert prune_changes(datetime(2001, 1, 1)) >= 1
+    assert client.get(f'/sync?since={stale}').status_code == 410
+    assert [row['duration'] for row in sync(client, kept)['changes']['workouts']] == [32]
+
+    # The newest entry survives, so up-to-date cursors stay valid
+    latest = client.get('/sync').get_json()['next_cursor']
+    with app.app_context():
+        prune_changes(datetime.utcnow() + timedelta(days=1))
+    assert client.get('/sync').get_json()['next_cursor'] == latest
+    assert sync(client, latest)['changes'] == {}
+
+
+def test_prune_command(app):
+    result = app.test_cli_runner().invoke(args=['prune-changes', '--days', '36500'])
+    assert result.exit_code == 0
+    assert result.output == 'Pruned 0 change log entries\n'
@@ -0,0 +1,83 @@
+from conftest import USER_ID, login
+
+SESSION_ID = 3  # owned by USER_ID
+
+
+def log(client, sets):
+    return client.post(f'/workout-sessions/{SESSION_ID}/sets', json=sets)
+
+
+def test_resent_sets_are_not_logged_twice(client):
+    login(client, USER_ID)
+    sets = [{'exercise_id': 100, 'reps': 5, 'weight': 60, 'client_id': f'resend-{n}'} for n in range(3)]
+
+    first = log(client, sets)
+    assert first.status_code == 201
+    assert first.get_json()['inserted'] == 3
+
+    again = log(client, sets)
+    assert again.status_code == 200
+    assert again.get_json() == {'inserted': 0, 'duplicates': 3, 'personal_records': []}
+
+
+def test_partly_resent_batch_counts_only_new_sets(client):
+    login(client, USER_ID)
+    sets = [{'exercise_id': 100, 'reps': 5, 'weight': 60, 'client_id': f'partial-{n}'} for n in range(3)]
+    assert log(client, sets[:2]).get_json()['inserted'] == 2
+
+    response = log(client, sets)
+    assert response.status_code == 201
+    assert response.get_json()['inserted'] == 1
+    assert response.get_json()['duplicates'] == 2
+
+
+def test_personal_record_only_rises(client):
+    login(client, USER_ID)
+    response = log(client, [{'exercise_id': 100, 'reps': 1, 'weight': 500}, {'exercise_id': 100, 'reps': 3, 'weight': 450}])
+    assert response.get_json()['personal_records'] == [{'exercise_id': 100, 'personal_record': 500}]
+
+    # Lighter sets and zero-rep attempts leave the record alone
+    response = log(client, [{'exercise_id': 100, 'reps': 5, 'weight': 400}, {'exercise_id': 100, 'reps': 0, 'weight': 900}])
+    assert response.status_code == 201
+    assert response.get_json()['personal_records'] == []
+
+
+def test_invalid_batch_is_rejected_whole(client):
+    login(client, USER_ID)
+    before = len(client.get(f'/workout-sessions/{SESSION_ID}').get_json()['set_logs'])
+    response = log(client, [{'exercise_id': 100, 'reps': 5}, {'exercise_id': 999999, 'reps': 5}])
+    assert response.status_code == 400
+    assert response.get_json()['details'] == [{'index': 1, 'error': 'Exercise 999999 not found'}]
+    assert len(client.get(f'/workout-sessions/{SESSION_ID}').get_json()['set_logs']) == before
+
+
+def test_deleting_an_exercise_deletes_its_sets(client):
+    login(client, USER_ID)
+    exercise = client.post('/exercises', json={'name': 'Retired', 'category': 'Cardio', 'muscle_group': 'Legs',
+                                               'difficulty': 'Beginner', 'instructions': 'Row', 'instructor_id': 1})
+    exercise_id = exercise.get_json()['id']
+    assert log(client, [{'exercise_id': exercise_id, 'reps': 5, 'weight': 30}, {'exercise_id': 100, 'reps': 5}]).status_code == 201
+
+    assert client.delete(f'/exercises/{exercise_id}').status_code == 204
+    logged = [row['exercise_id'] for row in client.get(f'/workout-sessions/{SESSION_ID}').get_json()['set_logs']]
+    assert exercise_id not in logged
+    assert 100 in logged
+
+
+def test_deleting_a_workout_keeps_its_sessions(client):
+    login(client, USER_ID)
+    workout = client.post('/workouts', json={'name': 'Short lived', 'duration': 10, 'instructor_id': 1}).get_json()
+    created = client.post('/workout-sessions', json={'workout_id': workout['id'], 'started_at': '2025-03-01T08:00:00Z'})
+    session_id = created.get_json()['id']
+
+    assert client.delete(f"/workouts/{workout['id']}").status_code == 204
+    response = client.get(f'/workout-sessions/{session_id}')
+    assert response.status_code == 200
+    assert response.get_json()['workout_id'] is None
+
+
+def test_session_cannot_follow_another_users_workout(client):
+    login(client, USER_ID)
+    assert client.post('/workout-sessions', json={'workout_id': 111, 'started_at': '2025-03-01T08:00:00Z'}).status_code == 403
+    # Templates are open to everyone
+    assert client.post('/workout-sessions', json={'workout_id': 7, 'started_at': '2025-03-01T08:00:00Z'}).status_code == 201
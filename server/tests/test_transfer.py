@@ -0,0 +1,57 @@
+import json
+
+from conftest import ADMIN_ID, login
+
+
+def line(table, **row):
+    return json.dumps({'table': table, 'row': row}).encode() + b'\n'
+
+
+def exercise(id, instructor_id):
+    return line('exercises', id=id, name=f'Imported {id}', category='Yoga', muscle_group='Core',
+                difficulty='Beginner', instructions='Breathe', instructor_id=instructor_id)
+
+
+HEAD = [
+    line('instructors', id=950, name='Imported A', specialty='Yoga'),
+    line('instructors', id=951, name='Imported B', specialty='Yoga'),
+    exercise(9500, 950),
+    exercise(9501, 999999),  # missing parent
+    exercise(9502, 951),
+]
+TAIL = [exercise(9504, 950), exercise(9503, 951)]
+
+
+def test_interrupted_import_resumes_from_committed_bytes(client):
+    login(client, ADMIN_ID)
+    good = b''.join(HEAD + TAIL)
+    bad = b''.join(HEAD + [b'{"table": "exercises"\n'] + TAIL[1:])
+
+    # Chunks of two: the instructors, then 9500 and 9501 are committed;
+    # 9502 is rolled back with the bad line
+    failed = client.post('/admin/import?chunk_size=2', data=bad)
+    assert failed.status_code == 400
+    assert failed.get_json()['committed_bytes'] == len(b''.join(HEAD[:4]))
+    assert client.get('/exercises/9500').status_code == 200
+    assert client.get('/exercises/9502').status_code == 404
+
+    resumed = client.post('/admin/import?chunk_size=2', data=good[failed.get_json()['committed_bytes']:])
+    assert resumed.status_code == 200
+    assert resumed.get_json()['rows']['exercises'] == 3
+    assert resumed.get_json()['committed_bytes'] == len(good) - failed.get_json()['committed_bytes']
+    assert client.get('/exercises/9502').status_code == 200
+    assert client.get('/exercises/9501').status_code == 404
+
+
+def test_reimport_counts_only_new_rows(client):
+    login(client, ADMIN_ID)
+    body = b''.join([line('instructors', id=960, name='Imported C', specialty='Yoga'),
+                     exercise(9600, 960), exercise(9601, 999999)])
+    first = client.post('/admin/import', data=body).get_json()
+    assert first['rows']['instructors'] == 1
+    assert first['rows']['exercises'] == 1
+    assert first['skipped']['exercises'] == 1
+
+    again = client.post('/admin/import', data=body).get_json()
+    assert again['rows'] == {name: 0 for name in again['rows']}
+    assert again['skipped']['exercises'] == 1
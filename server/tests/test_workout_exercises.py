@@ -0,0 +1,21 @@
+from conftest import USER_ID, login
+
+WORKOUT_ID = 107  # owned by USER_ID
+
+
+def test_put_empty_list_clears_the_workout(client):
+    login(client, USER_ID)
+    url = f'/workouts/{WORKOUT_ID}/exercises'
+    assert client.put(url, json=[{'exercise_id': 5, 'sets': 3, 'reps': 8}]).status_code == 200
+
+    response = client.put(url, json=[])
+    assert response.status_code == 200
+    assert response.get_json()['workout_exercises'] == []
+    assert client.get(f'/workouts/{WORKOUT_ID}/full').get_json()['workout_exercises'] == []
+
+
+def test_post_empty_list_is_rejected(client):
+    login(client, USER_ID)
+    response = client.post(f'/workouts/{WORKOUT_ID}/exercises', json=[])
+    assert response.status_code == 400
+    assert response.get_json()['details'] == [{'error': 'Expected a non-empty JSON array of exercises'}]
@@ -0,0 +1,162 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, or_, select, update
+
+from models import db, Exercise, SetLog, UserExercise, WorkoutSession
+from database import dialect_insert
+from sync import UPSERT, record_changes
+
+MAX_SET_LOGS = 1000
+
+set_logs = SetLog.__table__
+workout_sessions = WorkoutSession.__table__
+user_exercises = UserExercise.__table__
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_datetime(value):
+    """ISO 8601 string -> naive UTC datetime, like the rest of the schema."""
+    if not isinstance(value, str):
+        raise ValueError(value)
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _upsert(table):
+    statement = dialect_insert(table)
+    if statement is None:
+        raise RuntimeError('Set logging needs ON CONFLICT support (SQLite or PostgreSQL)')
+    return statement
+
+
+def validate_set_logs(entries):
+    if not isinstance(entries, list) or not entries:
+        return None, [{'error': 'Expected a non-empty JSON array of sets'}]
+    if len(entries) > MAX_SET_LOGS:
+        return None, [{'error': f'At most {MAX_SET_LOGS} sets per request'}]
+
+    rows, errors = [], []
+    allowed = {'exercise_id', 'reps', 'weight', 'performed_at', 'client_id'}
+    now = datetime.utcnow()
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            errors.append({'index': index, 'error': 'Expected an object'})
+            continue
+        problems = []
+        unknown = set(entry) - allowed
+        if unknown:
+            problems.append(f"Unknown fields: {', '.join(sorted(unknown))}")
+        if not _is_int(entry.get('exercise_id')):
+            problems.append('exercise_id is required and must be an integer')
+        if not _is_int(entry.get('reps')) or entry['reps'] < 0:
+            problems.append('reps is required and must be a non-negative integer')
+        weight = entry.get('weight')
+        if weight is not None and (isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0):
+            problems.append('weight must be a non-negative number')
+        performed_at = now
+        if entry.get('performed_at') is not None:
+            try:
+                performed_at = parse_datetime(entry['performed_at'])
+            except ValueError:
+                problems.append('performed_at must be an ISO 8601 datetime')
+        client_id = entry.get('client_id')
+        if client_id is not None and (not isinstance(client_id, str) or not 0 < len(client_id) <= 64):
+            problems.append('client_id must be a string of 1 to 64 characters')
+        if problems:
+            errors.append({'index': index, 'error': '; '.join(problems)})
+            continue
+        rows.append({
+            'exercise_id': entry['exercise_id'],
+            'reps': entry['reps'],
+            'weight': weight,
+            'performed_at': performed_at,
+            'client_id': client_id,
+            'created_at': now,
+        })
+
+    if not errors:
+        # One IN query validates every referenced exercise
+        requested = {row['exercise_id'] for row in rows}
+        found = set(db.session.scalars(select(Exercise.id).where(Exercise.id.in_(requested))))
+        for index, row in enumerate(rows):
+            if row['exercise_id'] not in found:
+                errors.append({'index': index, 'error': f"Exercise {row['exercise_id']} not found"})
+    return rows, errors
+
+
+def update_personal_records(user_id, best):
+    """Raise user_id's personal_record for each {exercise_id: weight} in best
+    where weight beats the stored record.
+
+    Incremental: new sets are compared with the stored record in one upsert,
+    never with the set history. Exercises not yet in the user's profile are
+    added to it. Returns the changed (id, exercise_id, personal_record) rows.
+    """
+    if not best:
+        return []
+    now = datetime.utcnow()
+    statement = _upsert(user_exercises)
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=[user_exercises.c.user_id, user_exercises.c.exercise_id],
+        set_={'personal_record': excluded.personal_record, 'updated_at': excluded.updated_at},
+        where=or_(user_exercises.c.personal_record.is_(None),
+                  user_exercises.c.personal_record < excluded.personal_record),
+    ).returning(user_exercises.c.id, user_exercises.c.exercise_id, user_exercises.c.personal_record)
+    return db.session.execute(statement, [
+        {'user_id': user_id, 'exercise_id': exercise_id, 'personal_record': weight,
+         'created_at': now, 'updated_at': now}
+        for exercise_id, weight in best.items()
+    ]).all()
+
+
+def log_sets(workout_session, rows):
+    """Append rows (from validate_set_logs) to workout_session with one
+    executemany INSERT and update personal records.
+
+    Sets whose client_id the user already logged are skipped, so a device
+    can resend a batch after a lost response. Returns (number inserted,
+    changed personal records).
+    """
+    for row in rows:
+        row['session_id'] = workout_session.id
+        row['user_id'] = workout_session.user_id
+    # RETURNING yields only the rows actually inserted, which executemany's
+    # rowcount doesn't reliably report
+    inserted = db.session.execute(_upsert(set_logs).on_conflict_do_nothing().returning(set_logs.c.id), rows).all()
+
+    best = {}
+    for row in rows:
+        if row['reps'] > 0 and row['weight'] and row['weight'] > best.get(row['exercise_id'], 0):
+            best[row['exercise_id']] = row['weight']
+    records = update_personal_records(workout_session.user_id, best)
+    # The upsert bypasses the session, so /sync is told here
+    record_changes(db.session.connection(), 'user_exercises',
+                   [{'id': id, 'user_id': workout_session.user_id} for id, _, _ in records], UPSERT)
+    return len(inserted), records
+
+
+def delete_set_logs(session_id=None, user_id=None, exercise_id=None):
+    """Delete the set logs of one session or one exercise, or all of a
+    user's sessions and set logs, with set-based DELETEs."""
+    if session_id is not None:
+        db.session.execute(delete(set_logs).where(set_logs.c.session_id == session_id))
+    if exercise_id is not None:
+        db.session.execute(delete(set_logs).where(set_logs.c.exercise_id == exercise_id))
+    if user_id is not None:
+        db.session.execute(delete(set_logs).where(set_logs.c.user_id == user_id))
+        db.session.execute(delete(workout_sessions).where(workout_sessions.c.user_id == user_id))
+
+
+def detach_workout_sessions(workout_id):
+    """Unlink sessions from a workout about to be deleted. The sessions and
+    their sets are the user's history, so they are kept."""
+    db.session.execute(
+        update(workout_sessions).where(workout_sessions.c.workout_id == workout_id)
+        .values(workout_id=None, updated_at=datetime.utcnow())
+    )
@@ -0,0 +1,226 @@
+import gzip
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import insert, select, text
+
+from models import db, Instructor, Exercise, Workout, WorkoutExercise, UserExercise
+from conditional import bump_versions
+from search import create_search_index
+from cache import catalog_cache
+from database import dialect_insert
+from representations import dumps, loads
+from sync import UPSERT, record_changes
+
+# Parents before children, so a file written in this order loads in one pass
+TRANSFER_MODELS = (Instructor, Exercise, Workout, WorkoutExercise, UserExercise)
+TRANSFER_TABLES = {model.__tablename__: model.__table__ for model in TRANSFER_MODELS}
+TABLE_ORDER = [model.__tablename__ for model in TRANSFER_MODELS]
+
+EXPORT_BATCH_SIZE = 5000
+IMPORT_CHUNK_SIZE = 5000
+
+
+class TransferError(ValueError):
+    pass
+
+
+def open_file(path, mode):
+    """Open path in binary mode, gzip-compressed if it ends in .gz."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 'b')
+    return open(path, mode + 'b')
+
+
+def _encode_row(table_name, row):
+    values = {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()}
+    return dumps({'table': table_name, 'row': values}) + b'\n'
+
+
+def export_lines(tables=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield NDJSON lines, one per row: {"table": ..., "row": {...}}.
+
+    Tables come in foreign-key order and rows in id order, read yield_per
+    batch_size from a server-side cursor, so memory does not grow with the
+    table size.
+    """
+    for name in TABLE_ORDER:
+        if tables and name not in tables:
+            continue
+        table = TRANSFER_TABLES[name]
+        result = db.session.execute(
+            select(table).order_by(table.c.id).execution_options(yield_per=batch_size)
+        )
+        for rows in result.mappings().partitions():
+            yield b''.join(_encode_row(name, row) for row in rows)
+
+
+def _parse_row(table, values, line_number):
+    row = {}
+    for key, value in values.items():
+        column = table.columns.get(key)
+        if column is None:
+            raise TransferError(f'Line {line_number}: unknown column {table.name}.{key}')
+        if value is not None and isinstance(column.type, db.DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise TransferError(f'Line {line_number}: invalid datetime for {table.name}.{key}')
+        row[key] = value
+    return row
+
+
+def _existing_parents(table, rows):
+    """Drop rows whose foreign keys point at missing parents, e.g. users
+    that are not part of the export. One IN query per foreign key."""
+    for foreign_key in table.foreign_keys:
+        column = foreign_key.parent.name
+        parent = foreign_key.column
+        ids = {row[column] for row in rows if row.get(column) is not None}
+        if not ids:
+            continue
+        found = set(db.session.execute(select(parent).where(parent.in_(ids))).scalars())
+        rows = [row for row in rows if row.get(column) is None or row[column] in found]
+    return rows
+
+
+def _insert_ignoring_existing(table):
+    # Rows whose id (or another unique key) already exists are left alone, so
+    # re-running an import after a crash does not duplicate or fail
+    statement = dialect_insert(table)
+    if statement is None:
+        return insert(table)
+    return statement.on_conflict_do_nothing()
+
+
+class Importer:
+    """Load NDJSON written by export_lines in chunks of chunk_size rows.
+
+    Each chunk is one executemany INSERT and one commit. counts are the rows
+    inserted; rows that already existed are not counted. After every commit
+    the byte offset reached is passed to on_commit, which is what makes an
+    import resumable: restart from that offset and nothing is lost or
+    inserted twice.
+    """
+
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE, on_commit=None):
+        self.chunk_size = chunk_size
+        self.on_commit = on_commit
+        self.counts = {name: 0 for name in TABLE_ORDER}
+        self.skipped = {name: 0 for name in TABLE_ORDER}
+        self._table = None
+        self._rows = []
+
+    def _flush(self, offset):
+        if self._rows:
+            table = self._table
+            rows = _existing_parents(table, self._rows)
+            if rows:
+                # RETURNING yields only the rows actually inserted, which
+                # executemany's rowcount doesn't reliably report
+                inserted = db.session.execute(_insert_ignoring_existing(table).returning(table.c.id), rows).all()
+                self.counts[table.name] += len(inserted)
+                # Rows that already existed are logged too; clients re-read them
+                record_changes(db.session.connection(), table.name, rows, UPSERT)
+            self.skipped[table.name] += len(self._rows) - len(rows)
+            self._rows = []
+        db.session.commit()
+        if self.on_commit:
+            self.on_commit(offset, self.counts, self.skipped)
+
+    def run(self, stream, offset=0):
+        """Read lines from stream (binary, positioned at offset) until EOF.
+
+        Returns the offset after the last committed line.
+        """
+        line_number = 0
+        try:
+            for line in stream:
+                line_number += 1
+                if not line.strip():
+                    offset += len(line)
+                    continue
+                try:
+                    record = loads(line)
+                    name, values = record['table'], record['row']
+                except (ValueError, KeyError, TypeError):
+                    raise TransferError(f'Line {line_number}: expected {{"table": ..., "row": {{...}}}}')
+                table = TRANSFER_TABLES.get(name)
+                if table is None:
+                    raise TransferError(f'Line {line_number}: unknown table {name}')
+                if table is not self._table:
+                    if self._table is not None and TABLE_ORDER.index(name) < TABLE_ORDER.index(self._table.name):
+                        raise TransferError(
+                            f'Line {line_number}: {name} after {self._table.name}; tables must be in the order '
+                            + ', '.join(TABLE_ORDER)
+                        )
+                    self._flush(offset)
+                    self._table = table
+                self._rows.append(_parse_row(table, values, line_number))
+                offset += len(line)
+                if len(self._rows) >= self.chunk_size:
+                    self._flush(offset)
+            self._flush(offset)
+        except Exception:
+            db.session.rollback()
+            raise
+        return offset
+
+
+def finish_import():
+    """Refresh derived state after rows were written behind the ORM's back."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # Explicit ids do not advance the id sequences
+        for name in TABLE_ORDER:
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), COALESCE(MAX(id), 1)) FROM {name}"
+            ))
+    bump_versions('exercises', 'instructors', 'workouts')
+    create_search_index(db.session.connection())
+    db.session.commit()
+    catalog_cache.clear()
+
+
+def read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_checkpoint(path, state):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(temp_path, path)
+
+
+def import_file(path, chunk_size=IMPORT_CHUNK_SIZE, checkpoint_path=None, restart=False, progress=None):
+    """Import an NDJSON (or .ndjson.gz) file, resuming from checkpoint_path
+    when a checkpoint for the same file exists. Returns (counts, skipped)."""
+    checkpoint_path = checkpoint_path or path + '.checkpoint'
+    state = None if restart else read_checkpoint(checkpoint_path)
+    if state and state.get('path') != os.path.abspath(path):
+        state = None
+    offset = state['offset'] if state else 0
+
+    def on_commit(offset, counts, skipped):
+        write_checkpoint(checkpoint_path, {
+            'path': os.path.abspath(path), 'offset': offset, 'counts': counts, 'skipped': skipped,
+        })
+        if progress:
+            progress(offset, counts)
+
+    importer = Importer(chunk_size, on_commit)
+    if state:
+        # Counts carry over so the final report covers the whole file
+        importer.counts.update(state.get('counts', {}))
+        importer.skipped.update(state.get('skipped', {}))
+    with open_file(path, 'r') as stream:
+        stream.seek(offset)
+        importer.run(stream, offset)
+    finish_import()
+    os.remove(checkpoint_path)
+    return importer.counts, importer.skipped